@@ -0,0 +1,54 @@
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+# cold-start cost of the package: every import runs in a fresh interpreter, the median of --runs is checked against
+# --budget-ms. Run python -m compileall libless_nn first, with PYTHONDONTWRITEBYTECODE set every run compiles again.
+# python benchmarks/import_time.py --budget-ms 20
+REPOSITORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# what each import may not drag in with it
+FORBIDDEN = {
+    "libless_nn": ["numpy", "multiprocessing", "libless_nn.python_backend", "libless_nn.numpy_backend"],
+    "libless_nn.python_backend": ["numpy", "multiprocessing"],
+    "libless_nn.numpy_backend": ["multiprocessing"],
+}
+
+PROBE = """
+import sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(elapsed, *[name for name in {forbidden!r} if name in sys.modules])
+"""
+
+
+def import_time(module, forbidden, runs):
+    timings = []
+    for run in range(runs):
+        result = subprocess.run([sys.executable, "-c", PROBE.format(module=module, forbidden=forbidden)],
+                                capture_output=True, text=True, check=True, cwd=REPOSITORY)
+        elapsed, *loaded = result.stdout.split()
+        if loaded:
+            raise AssertionError(f"import {module} also imported {', '.join(loaded)}")
+        timings.append(float(elapsed) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time a cold import of libless_nn and its backends")
+    parser.add_argument("--runs", type=int, default=15)
+    parser.add_argument("--budget-ms", type=float, default=20, help="the most import libless_nn may take")
+    arguments = parser.parse_args()
+    timings = {module: import_time(module, forbidden, arguments.runs) for module, forbidden in FORBIDDEN.items()}
+    for module, milliseconds in timings.items():
+        print(f"import {module}: {milliseconds:.2f} ms")
+    package = timings["libless_nn"]
+    if package > arguments.budget_ms:
+        raise AssertionError(f"import libless_nn took {package:.2f} ms, the budget is {arguments.budget_ms} ms")
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,241 @@
+import argparse
+import contextlib
+import io
+import itertools
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import libless_nn
+
+# training and prediction throughput of every backend over a grid of network and batch sizes.
+# python benchmarks/throughput.py --output results.json
+# python benchmarks/throughput.py --baseline results.json --tolerance 0.2
+# exits with 1 when a configuration got slower than the baseline by more than the tolerance, or by more than the
+# two runs' own spread between repeats when that is larger. A fixed reference workload is timed next to every
+# configuration and the comparison divides out how fast the machine itself ran, shared hosts drift by tens of percent
+
+OUTPUT_SIZE = 10
+# what is compared against the baseline, higher is better for all of them
+COMPARED = ["train_samples_per_second", "predict_samples_per_second"]
+# every timing loops its workload until it takes at least this long, so sub-millisecond runs are not timer noise
+MINIMUM_SECONDS = 0.05
+
+
+def synthetic_data(samples, input_size, seed):
+    # the same rows for every backend, as lists, the NumPy backends turn them into arrays themselves
+    generator = random.Random(seed)
+    questions = [[generator.random() for n in range(input_size)] for m in range(samples)]
+    labels = [generator.randrange(OUTPUT_SIZE) for m in range(samples)]
+    answers = [[1 if j == label else 0 for j in range(OUTPUT_SIZE)] for label in labels]
+    return questions, answers
+
+
+def engine_data(engine, questions, answers):
+    if engine == "python":
+        return questions, answers
+    import numpy as np
+    return np.array(questions), np.array(answers, dtype=np.float64)
+
+
+def make_network(engine, config):
+    random.seed(0)
+    network = libless_nn.create(config["input_size"], config["depth"], config["width"], OUTPUT_SIZE,
+                                "Leaky_ReLU", "Softmax", backend=engine)
+    network.initialize_optimizer(0.9, 0.999, 1e-8, 0.01)
+    return network
+
+
+def train_step(engine, network, questions, answers):
+    # one mini-batch, what NN.train does between two optimizer steps
+    if engine == "python":
+        for sample, answer in zip(questions, answers):
+            network.compute_gradients(sample, answer, "log")
+        for layer in network.layers:
+            layer.update_w_and_b(len(questions))
+    else:
+        network.compute_gradients(questions, answers, "log")
+        network.update_w_and_b(len(questions))
+
+
+def percentiles(timings):
+    cuts = statistics.quantiles(timings, n=100, method="inclusive")
+    return {"p50": cuts[49] * 1000, "p90": cuts[89] * 1000, "p99": cuts[98] * 1000}
+
+
+def timed_loops(run, loops):
+    start = time.perf_counter()
+    for loop in range(loops):
+        run()
+    return (time.perf_counter() - start) / loops
+
+
+def median_of(repeats, run):
+    # the median seconds per run over repeats timings, and their spread relative to it. Each timing loops run
+    # as often as it takes to last MINIMUM_SECONDS, the loop count is settled first
+    loops = 1
+    while timed_loops(run, loops) * loops < MINIMUM_SECONDS:
+        loops *= 2
+    timings = [timed_loops(run, loops) for repeat in range(repeats)]
+    median = statistics.median(timings)
+    return median, (max(timings) - min(timings)) / median
+
+
+def reference_workload():
+    # plain interpreter work that no change to libless_nn can speed up or slow down
+    total = 0
+    for i in range(20000):
+        total += i * i % 7
+    return total
+
+
+def peak_memory(run):
+    # tracemalloc sees the NumPy buffers as well, it slows everything down so it gets a run of its own
+    tracemalloc.start()
+    try:
+        run()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def benchmark(engine, config, questions, answers, epochs, repeats, steps):
+    questions, answers = engine_data(engine, questions, answers)
+    batch_size = config["batch_size"]
+    network = make_network(engine, config)
+    quiet = contextlib.redirect_stdout(io.StringIO())
+
+    def train():
+        with quiet:
+            network.train(epochs, questions, answers, batch_size)
+
+    def predict():
+        with quiet:
+            network.predict(questions)
+
+    reference_time = median_of(repeats, reference_workload)[0]
+    train_time, train_spread = median_of(repeats, train)
+    predict_time, predict_spread = median_of(repeats, predict)
+    step_timings = []
+    predict_timings = []
+    batches = itertools.cycle(range(0, len(questions) - batch_size + 1, batch_size))
+    for step in range(steps):
+        start = next(batches)
+        batch = questions[start:start + batch_size], answers[start:start + batch_size]
+        step_start = time.perf_counter()
+        train_step(engine, network, *batch)
+        step_timings.append(time.perf_counter() - step_start)
+        step_start = time.perf_counter()
+        with quiet:
+            network.predict(batch[0])
+        predict_timings.append(time.perf_counter() - step_start)
+    return {
+        "engine": engine,
+        **config,
+        "train_samples_per_second": epochs * len(questions) / train_time,
+        "predict_samples_per_second": len(questions) / predict_time,
+        "train_spread": train_spread,
+        "reference_seconds": reference_time,
+        "predict_spread": predict_spread,
+        "train_step_ms": percentiles(step_timings),
+        "predict_batch_ms": percentiles(predict_timings),
+        "train_peak_bytes": peak_memory(train),
+        "predict_peak_bytes": peak_memory(predict),
+    }
+
+
+def configuration_key(result):
+    return (result["engine"], result["input_size"], result["depth"], result["width"], result["batch_size"])
+
+
+def compare(results, baseline, tolerance):
+    # every configuration found in both runs, the ones only in one of them are skipped. A slowdown counts once it is
+    # beyond the tolerance and beyond the spread the two runs saw between their own repeats, their noise floor.
+    # Throughputs are scaled by the reference workload's time, which takes out a machine that ran slower overall
+    baseline_results = {configuration_key(result): result for result in baseline["results"]}
+    regressions = []
+    for result in results:
+        before = baseline_results.get(configuration_key(result))
+        if before is None:
+            continue
+        for metric in COMPARED:
+            spread = metric.replace("_samples_per_second", "_spread")
+            allowed = max(tolerance, result.get(spread, 0) + before.get(spread, 0))
+            machine = result["reference_seconds"] / before["reference_seconds"] if "reference_seconds" in before else 1
+            change = result[metric] * machine / before[metric] - 1
+            print(f"{result['engine']:>13} {configuration_key(result)[1:]} {metric}: {change:+.1%} "
+                  f"(allowed -{allowed:.1%}, machine at {1 / machine:.0%} of its baseline speed)")
+            if change < -allowed:
+                regressions.append((configuration_key(result), metric, change))
+    return regressions
+
+
+def environment():
+    info = {"python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S")}
+    if "numpy" in libless_nn.available_backends():
+        import numpy as np
+        info["numpy"] = np.__version__
+    return info
+
+
+def integers(text):
+    return [int(value) for value in text.split(",")]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time training and prediction of the libless_nn backends")
+    parser.add_argument("--engines", default=",".join(libless_nn.available_backends()))
+    parser.add_argument("--input-sizes", type=integers, default=[4, 64])
+    parser.add_argument("--depths", type=integers, default=[1, 3], help="inner_layers_number")
+    parser.add_argument("--widths", type=integers, default=[16, 64], help="height")
+    parser.add_argument("--batch-sizes", type=integers, default=[16, 128])
+    parser.add_argument("--samples", type=int, default=512)
+    parser.add_argument("--epochs", type=int, default=1)
+    parser.add_argument("--repeats", type=int, default=5, help="the median of this many timings is kept")
+    parser.add_argument("--steps", type=int, default=10, help="mini-batches timed one by one for the latencies, at least 2")
+    parser.add_argument("--output", help="where to write the JSON results")
+    parser.add_argument("--baseline", help="JSON results of an earlier run to compare with")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="the slowdown allowed before it counts as a regression")
+    arguments = parser.parse_args()
+    if arguments.steps < 2:
+        parser.error("--steps must be at least 2, the latency percentiles need two timings")
+    if arguments.repeats < 1:
+        parser.error("--repeats must be at least 1")
+    results = []
+    for input_size, depth, width, batch_size in itertools.product(arguments.input_sizes, arguments.depths,
+                                                                  arguments.widths, arguments.batch_sizes):
+        config = {"input_size": input_size, "depth": depth, "width": width, "batch_size": batch_size}
+        questions, answers = synthetic_data(arguments.samples, input_size, seed=input_size)
+        for engine in arguments.engines.split(","):
+            result = benchmark(engine, config, questions, answers, arguments.epochs, arguments.repeats, arguments.steps)
+            results.append(result)
+            print(f"{engine:>13} inputs {input_size:>4} depth {depth:>2} width {width:>4} batch {batch_size:>4}: "
+                  f"train {result['train_samples_per_second']:>10.0f}/s, predict {result['predict_samples_per_second']:>10.0f}/s, "
+                  f"step p50 {result['train_step_ms']['p50']:.3f} ms, peak {result['train_peak_bytes'] / 1024:.0f} KiB")
+    report = {"environment": environment(), "settings": {"samples": arguments.samples, "epochs": arguments.epochs,
+                                                         "repeats": arguments.repeats, "steps": arguments.steps},
+              "results": results}
+    if arguments.output:
+        with open(arguments.output, "w") as file:
+            json.dump(report, file, indent=2)
+    if arguments.baseline:
+        with open(arguments.baseline) as file:
+            baseline = json.load(file)
+        if baseline["settings"] != report["settings"]:
+            print(f"The baseline ran with {baseline['settings']}, the numbers may not compare")
+        regressions = compare(results, baseline, arguments.tolerance)
+        for key, metric, change in regressions:
+            print(f"Regression: {key} {metric} {change:+.1%}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+import importlib
+
+# importing the package loads nothing else: the backends, numpy with them, come in on first use.
+# "python" needs nothing but the standard library, "numpy" sends every sample through on its own like the first
+# NumPy version, "numpy_batched" does a whole mini-batch per matmul.
+# They all start from the same weights for the same random.seed and read and write the same checkpoint files
+BACKENDS = {
+    "python": ("libless_nn.python_backend", "NN"),
+    "numpy": ("libless_nn.numpy_backend", "PerSampleNN"),
+    "numpy_batched": ("libless_nn.numpy_backend", "NN"),
+}
+
+# names looked up in their module the first time they are asked for, see __getattr__
+LAZY_NAMES = {
+    "Callback": "libless_nn.callbacks",
+    "ProgressPrinter": "libless_nn.callbacks",
+    "Validation": "libless_nn.callbacks",
+    "MetricsLogger": "libless_nn.callbacks",
+    "EarlyStopping": "libless_nn.callbacks",
+    "MemorySink": "libless_nn.callbacks",
+    "AsyncFileSink": "libless_nn.callbacks",
+    "Metrics": "libless_nn.metrics",
+    "evaluate": "libless_nn.metrics",
+    "StepDecay": "libless_nn.schedules",
+    "CosineDecay": "libless_nn.schedules",
+    "Warmup": "libless_nn.schedules",
+    "ReduceOnPlateau": "libless_nn.schedules",
+    "layer": "libless_nn.builder",
+    "sequential": "libless_nn.builder",
+    "Sweep": "libless_nn.sweep",
+    "grid": "libless_nn.sweep",
+    "random_search": "libless_nn.sweep",
+    "Uniform": "libless_nn.sweep",
+    "LogUniform": "libless_nn.sweep",
+    "Profiler": "libless_nn.profiling",
+    "format_report": "libless_nn.profiling",
+    "read_header": "libless_nn.checkpoint",
+    "write_checkpoint": "libless_nn.checkpoint",
+    "Dataset": "libless_nn.numpy_backend",
+    "MemmapDataset": "libless_nn.numpy_backend",
+    "TabularData": "libless_nn.numpy_backend",
+    "load_csv": "libless_nn.numpy_backend",
+    "InferenceModel": "libless_nn.numpy_backend",
+    "QuantizedModel": "libless_nn.numpy_backend",
+    "quantize": "libless_nn.numpy_backend",
+}
+
+
+def __getattr__(name):
+    if name in LAZY_NAMES:
+        value = getattr(importlib.import_module(LAZY_NAMES[name]), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(list(globals()) + list(LAZY_NAMES))
+
+
+def available_backends():
+    import importlib.util
+    if importlib.util.find_spec("numpy") is None:
+        return ["python"]
+    return list(BACKENDS)
+
+
+def default_backend():
+    # the fastest one this host allows
+    return available_backends()[-1]
+
+
+def network_class(backend=None):
+    backend = default_backend() if backend is None else backend
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend: {backend}")
+    module_name, class_name = BACKENDS[backend]
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+def create(input_size, inner_layers_number, height, output_size, inner_layer_activation, last_layer_activation,
+           backend=None, **options):
+    # options go to the backend, dtype and storage_dtype for the NumPy ones
+    return network_class(backend)(input_size, inner_layers_number, height, output_size, inner_layer_activation,
+                                  last_layer_activation, **options)
+
+
+def load(path, backend=None, **options):
+    return network_class(backend).load(path, **options)
\ No newline at end of file
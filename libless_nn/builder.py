@@ -0,0 +1,125 @@
+import math
+import operator
+import random
+
+from . import network_class
+
+# networks of any shape, one spec per layer instead of a single height for all of them.
+#     network = sequential(784, [layer(512, "ReLU", "he"), layer(128, "ReLU", "he"), layer(10, "Softmax")])
+# Shapes, activations and initializers are checked here, before anything is allocated, so a mistake names its layer
+# instead of turning up as a broadcasting error in the middle of training. Kept free of numpy like checkpoint.py,
+# the pure Python backend builds from the same specs
+
+ACTIVATIONS = ("None", "ReLU", "Leaky_ReLU", "Sigmoid", "Softmax", "Tanh", "GELU")
+# their gradients are worked out together with the loss, so they can only end the network
+OUTPUT_ACTIVATIONS = ("Softmax", "Sigmoid")
+SPEC_KEYS = ("units", "activation", "initializer", "dtype")
+
+
+def uniform(inputs, units):
+    # what Layer draws: biases first, then the weights row by row, all in [-1, 1)
+    biases = [random.random() * 2 - 1 for n in range(units)]
+    weights = [random.random() * 2 - 1 for n in range(inputs * units)]
+    return weights, biases
+
+
+def he(inputs, units):
+    # for ReLU and its relatives
+    deviation = math.sqrt(2 / inputs)
+    return [random.gauss(0, deviation) for n in range(inputs * units)], [0.0] * units
+
+
+def glorot(inputs, units):
+    # for Tanh, Sigmoid and Softmax
+    limit = math.sqrt(6 / (inputs + units))
+    return [random.uniform(-limit, limit) for n in range(inputs * units)], [0.0] * units
+
+
+def zeros(inputs, units):
+    return [0.0] * (inputs * units), [0.0] * units
+
+
+INITIALIZERS = {
+    "uniform": uniform,
+    "he": he,
+    "glorot": glorot,
+    "zeros": zeros,
+}
+
+
+def layer(units, activation="ReLU", initializer="uniform", dtype=None):
+    # dtype is optional, see validate
+    return {"units": units, "activation": activation, "initializer": initializer, "dtype": dtype}
+
+
+def dtype_name(dtype):
+    # "float32", np.float32 and np.dtype("float32") all name the same thing
+    return dtype.__name__ if isinstance(dtype, type) else getattr(dtype, "name", str(dtype))
+
+
+def positive_integer(value):
+    # ints and numpy integers, but not bools, None on anything else
+    if isinstance(value, bool):
+        return None
+    try:
+        value = operator.index(value)
+    except TypeError:
+        return None
+    return value if value >= 1 else None
+
+
+def validate(input_size, layers):
+    # the specs with the defaults filled in and each layer's inputs worked out from the one before it,
+    # ValueError naming the layer for anything that would not build or train
+    if positive_integer(input_size) is None:
+        raise ValueError(f"input_size must be a positive integer, not {input_size!r}")
+    if not layers:
+        raise ValueError("A network needs at least one layer")
+    checked = []
+    inputs = positive_integer(input_size)
+    for index, spec in enumerate(layers):
+        unknown = set(spec) - set(SPEC_KEYS)
+        if unknown:
+            raise ValueError(f"Layer {index}: unknown settings {sorted(unknown)}")
+        spec = dict(layer(spec.get("units")), **spec)
+        if positive_integer(spec["units"]) is None:
+            raise ValueError(f"Layer {index}: units must be a positive integer, not {spec['units']!r}")
+        spec["units"] = positive_integer(spec["units"])
+        if spec["activation"] not in ACTIVATIONS:
+            raise ValueError(f"Layer {index}: unknown activation {spec['activation']!r}, expected one of {ACTIVATIONS}")
+        if spec["activation"] in OUTPUT_ACTIVATIONS and index != len(layers) - 1:
+            raise ValueError(f"Layer {index}: {spec['activation']} can only be the last layer")
+        if spec["initializer"] not in INITIALIZERS:
+            raise ValueError(f"Layer {index}: unknown initializer {spec['initializer']!r}, expected one of {tuple(INITIALIZERS)}")
+        spec["inputs"] = inputs
+        inputs = spec["units"]
+        checked.append(spec)
+    # every layer's parameters are views into one flat buffer, so there is one dtype for all of them
+    dtypes = {dtype_name(spec["dtype"]) for spec in checked if spec["dtype"] is not None}
+    if len(dtypes) > 1:
+        raise ValueError(f"Layers ask for different dtypes {sorted(dtypes)}, they all share one parameter buffer")
+    return checked
+
+
+def sequential(input_size, layers, backend=None, **options):
+    # options go to the backend like in create, dtype and storage_dtype for the NumPy ones.
+    # The starting values are drawn layer by layer from the random module, random.seed makes them repeatable
+    layers = validate(input_size, layers)
+    layer_dtypes = [spec["dtype"] for spec in layers if spec["dtype"] is not None]
+    dtype = options.pop("dtype", layer_dtypes[0] if layer_dtypes else None)
+    if layer_dtypes and dtype_name(dtype) != dtype_name(layer_dtypes[0]):
+        raise ValueError(f"dtype {dtype_name(dtype)} does not match the layers' {dtype_name(layer_dtypes[0])}")
+    storage_dtype = options.pop("storage_dtype", None)
+    if options:
+        raise ValueError(f"Unknown options {sorted(options)}")
+    dtype = "float64" if dtype is None else dtype_name(dtype)
+    header = {
+        # what the rest of the code reads off a network, the hidden layers' activation is the first one's
+        "inner_layer_activation": layers[0]["activation"] if len(layers) > 1 else layers[-1]["activation"],
+        "last_layer_activation": layers[-1]["activation"],
+        "dtype": dtype,
+        "storage_dtype": dtype if storage_dtype is None else dtype_name(storage_dtype),
+        "layers": [{"inputs": spec["inputs"], "units": spec["units"], "activation": spec["activation"]} for spec in layers],
+    }
+    values = [INITIALIZERS[spec["initializer"]](spec["inputs"], spec["units"]) for spec in layers]
+    return network_class(backend).from_layers(header, values)
\ No newline at end of file
@@ -0,0 +1,166 @@
+import json
+import time
+
+# what NN.train tells the outside world: every callback hears about every batch and every epoch, in list order.
+# A callback may add to the logs of an epoch, the ones after it see the additions: put Validation before MetricsLogger
+
+
+class Callback:
+    def on_train_begin(self, network):
+        pass
+
+    def on_batch_end(self, network, epoch, batch, loss):
+        # loss is the mean loss of the samples of the batch, epoch counts from 1 and batch from 0
+        pass
+
+    def on_epoch_end(self, network, epoch, logs):
+        # logs starts out with epoch, epochs and loss, the average over the epoch
+        pass
+
+    def on_train_end(self, network):
+        pass
+
+
+class ProgressPrinter(Callback):
+    # the line NN.train has always printed, what it uses when it is given no callbacks
+    def on_epoch_end(self, network, epoch, logs):
+        print(f"Epochs completed: {epoch}/{logs['epochs']} |Average epoch loss: {logs['loss']}")
+
+
+class Validation(Callback):
+    # scores the network on held-out data every `every` epochs, batched, and adds val_loss, val_accuracy and
+    # val_confusion_matrix to the logs. Needs NumPy, on any backend
+    def __init__(self, questions, answers, every=1, classification=True, chunk_size=1024):
+        self.questions = questions
+        self.answers = answers
+        self.every = every
+        self.classification = classification
+        self.chunk_size = chunk_size
+
+    def on_epoch_end(self, network, epoch, logs):
+        if epoch % self.every:
+            return
+        from .metrics import Metrics, evaluate
+        num_classes = len(network.layers[-1].biases) if self.classification else None
+        loss_function = "log" if network.last_layer_activation == "Softmax" else "mse"
+        metrics = evaluate(network, self.questions, self.answers, Metrics(num_classes, loss_function), self.chunk_size)
+        logs.update(metrics.result(prefix="val_"))
+
+
+class MemorySink:
+    def __init__(self):
+        self.records = []
+
+    def write(self, record):
+        self.records.append(record)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class AsyncFileSink:
+    # JSON lines written by a background thread, so training never waits on a slow disk or terminal.
+    # target is a path, appended to, or an open file such as sys.stdout, which is left open
+    def __init__(self, target):
+        # only imported here, the backends import this module and should stay quick to import
+        import queue
+        import threading
+        self.owns_file = isinstance(target, str)
+        self.file = open(target, "a") if self.owns_file else target
+        self.records = queue.Queue()
+        self.error = None
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def run(self):
+        while True:
+            record = self.records.get()
+            try:
+                if record is None:
+                    return
+                if self.error is None:
+                    self.file.write(json.dumps(record) + "\n")
+                    # buffered while more is waiting, flushed once the thread catches up
+                    if self.records.empty():
+                        self.file.flush()
+            except BaseException as error:
+                self.error = error
+            finally:
+                self.records.task_done()
+
+    def write(self, record):
+        self.records.put(record)
+
+    def flush(self):
+        # waits for everything written so far to reach the file
+        self.records.join()
+        if self.error is not None:
+            error, self.error = self.error, None
+            raise error
+
+    def close(self):
+        self.records.put(None)
+        self.thread.join()
+        if self.owns_file:
+            self.file.close()
+        if self.error is not None:
+            error, self.error = self.error, None
+            raise error
+
+
+class MetricsLogger(Callback):
+    # every epoch's logs, and with batches=True every batch loss, go to the sink as dicts with a timestamp.
+    # The sink is flushed when training ends and stays open for the next run, closing it is up to its owner
+    def __init__(self, sink, batches=False):
+        self.sink = sink
+        self.batches = batches
+
+    def on_batch_end(self, network, epoch, batch, loss):
+        if self.batches:
+            self.sink.write({"time": time.time(), "epoch": epoch, "batch": batch, "loss": float(loss)})
+
+    def on_epoch_end(self, network, epoch, logs):
+        self.sink.write(dict(logs, time=time.time(), loss=float(logs["loss"])))
+
+    def on_train_end(self, network):
+        self.sink.flush()
+
+class EarlyStopping(Callback):
+    # stops training once monitor has not improved by min_delta for patience epochs that reported it, and puts back
+    # the weights of the best epoch from an in-memory snapshot when training ends. "max" mode for accuracies
+    def __init__(self, monitor="val_loss", patience=3, min_delta=0.0, mode=None, restore_best=True):
+        self.monitor = monitor
+        self.patience = patience
+        self.min_delta = min_delta
+        self.sign = -1 if (mode or ("max" if "accuracy" in monitor else "min")) == "max" else 1
+        self.restore_best = restore_best
+
+    def on_train_begin(self, network):
+        self.best = None
+        self.best_epoch = None
+        self.best_weights = None
+        self.waited = 0
+        self.stopped_epoch = None
+
+    def on_epoch_end(self, network, epoch, logs):
+        if self.monitor not in logs:
+            return
+        value = self.sign * logs[self.monitor]
+        if self.best is None or value < self.best - self.min_delta:
+            self.best = value
+            self.best_epoch = epoch
+            self.waited = 0
+            if self.restore_best:
+                self.best_weights = network.snapshot()
+            return
+        self.waited += 1
+        if self.waited >= self.patience:
+            self.stopped_epoch = epoch
+            network.stop_training = True
+
+    def on_train_end(self, network):
+        if self.best_weights is not None:
+            network.restore(self.best_weights)
\ No newline at end of file
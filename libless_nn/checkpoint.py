@@ -0,0 +1,78 @@
+import json
+import os
+import struct
+import sys
+from array import array
+
+# the file format every backend reads and writes, kept free of numpy so the pure Python backend can use it
+
+CHECKPOINT_MAGIC = b"LLNN"
+CHECKPOINT_VERSION = 1
+NATIVE_BYTE_ORDER = "<" if sys.byteorder == "little" else ">"
+FLOAT_FORMATS = {"f8": "d", "f4": "f", "f2": "e"}
+
+
+def blob_dtype(buffer):
+    # the numpy dtype string of a buffer, worked out from the buffer protocol for array("d") and friends
+    if hasattr(buffer, "dtype"):
+        return buffer.dtype.str
+    view = memoryview(buffer)
+    kind = "f" if view.format in "efd" else "u" if view.format in "BHILQ" else "i"
+    return f"{NATIVE_BYTE_ORDER}{kind}{view.itemsize}"
+
+
+def write_checkpoint(path, header, buffers):
+    # magic, version, header length, JSON header, then the raw buffers one after the other, 64 byte aligned.
+    # buffers are numpy arrays or anything else with the buffer protocol, array("d") for the pure Python backend
+    blob_offset = 0
+    header = dict(header, version=CHECKPOINT_VERSION, blobs=[])
+    views = [memoryview(buffer) for buffer in buffers.values()]
+    for name, buffer, view in zip(buffers, buffers.values(), views):
+        header["blobs"].append({"name": name, "dtype": blob_dtype(buffer), "count": view.nbytes // view.itemsize, "offset": blob_offset})
+        blob_offset += -(-view.nbytes // 64) * 64
+    header_bytes = json.dumps(header).encode()
+    header_end = -(-(len(CHECKPOINT_MAGIC) + 8 + len(header_bytes)) // 64) * 64
+    header_bytes = header_bytes.ljust(header_end - len(CHECKPOINT_MAGIC) - 8)
+    # written next to the target and renamed over it, so a crash never leaves half a checkpoint behind
+    temporary_path = f"{path}.tmp"
+    with open(temporary_path, "wb") as file:
+        file.write(CHECKPOINT_MAGIC)
+        file.write(struct.pack("<II", CHECKPOINT_VERSION, len(header_bytes)))
+        file.write(header_bytes)
+        for blob, view in zip(header["blobs"], views):
+            file.seek(header_end + blob["offset"])
+            file.write(view.tobytes())
+    os.replace(temporary_path, path)
+
+
+def read_header(path):
+    # the JSON header and where the blobs start, blob offsets count from there
+    with open(path, "rb") as file:
+        if file.read(len(CHECKPOINT_MAGIC)) != CHECKPOINT_MAGIC:
+            raise ValueError(f"{path} is not a checkpoint")
+        version, header_length = struct.unpack("<II", file.read(8))
+        if version > CHECKPOINT_VERSION:
+            raise ValueError(f"{path} is checkpoint version {version}, this code reads up to {CHECKPOINT_VERSION}")
+        header = json.loads(file.read(header_length))
+    return header, len(CHECKPOINT_MAGIC) + 8 + header_length
+
+
+def read_doubles(path, names):
+    # the named float blobs as array("d"), whatever float dtype they were stored in
+    header, header_end = read_header(path)
+    blobs = {}
+    with open(path, "rb") as file:
+        for blob in header["blobs"]:
+            if blob["name"] not in names:
+                continue
+            byte_order, size = blob["dtype"][0], blob["dtype"][1:]
+            if size not in FLOAT_FORMATS:
+                raise ValueError(f"{path}: {blob['name']} holds {blob['dtype']}, not floats")
+            file.seek(header_end + blob["offset"])
+            data = file.read(blob["count"] * int(size[1:]))
+            if size == "f8" and byte_order == NATIVE_BYTE_ORDER:
+                blobs[blob["name"]] = array("d")
+                blobs[blob["name"]].frombytes(data)
+            else:
+                blobs[blob["name"]] = array("d", struct.unpack(f"{byte_order}{blob['count']}{FLOAT_FORMATS[size]}", data))
+    return header, blobs
\ No newline at end of file
@@ -0,0 +1 @@
+# the demo scripts, each runs with python -m libless_nn.demos.<name> and trains nothing until main() is called
\ No newline at end of file
@@ -0,0 +1,63 @@
+import numpy as np
+
+from ..metrics import Metrics
+from ..numpy_backend import NN, quantize
+
+# what the NumPy demos share: scoring the predictions and the train, predict, check round
+
+def one_hot_encoding(data, data_types):
+    output = np.zeros((len(data), data_types), dtype=int)
+    output[np.arange(len(data)), data] = 1
+    return(output)
+
+def prediction_check(prediction, actual, is_classification):
+        # print(f"\nPredictions:\n{prediction}")
+        if actual is not None and len(actual) > 0:
+            # whole arrays at a time, see metrics.Metrics
+            metrics = Metrics(np.shape(actual)[1] if is_classification == True else None)
+            metrics.update(prediction, actual)
+            if is_classification == True:
+                accuracy = round((metrics.correct()/len(prediction))*100,5)
+                print(f"\nTotal accuracy: {accuracy} %")
+                return accuracy
+            else:
+                losses = np.mean(0.5 * np.square(np.asarray(prediction) - np.asarray(actual)), axis=1).tolist()
+                total_avg_loss = metrics.loss()
+                print(f"\nMean loss: {round(total_avg_loss,5)}")
+                print(f"\nAll losses: \n{losses}")
+                return total_avg_loss
+
+def quantization_check(neural, calibration_questions, predict_questions, predict_answers, is_classification):
+    # the held-out set through the float network and through its int8 copy
+    quantized = quantize(neural, calibration_questions)
+    print(f"\nFloat model ({neural.parameters.nbytes} bytes of parameters):", end="")
+    float_result = prediction_check(neural.predict(predict_questions), predict_answers, is_classification)
+    print(f"\nInt8 model ({quantized.nbytes} bytes of parameters):", end="")
+    quantized_result = prediction_check(quantized.predict(predict_questions), predict_answers, is_classification)
+    if float_result is not None:
+        print(f"\nInt8 minus float: {round(quantized_result - float_result, 5)}")
+    return quantized
+
+def train_and_test(input_size, 
+                   inner_layers_amount, 
+                   neurons_per_layer, 
+                   output_size, 
+                   inner_neuron_activation, 
+                   last_layer_activation, 
+                   epochs, learning_rate, 
+                   training_questions, 
+                   training_answers, 
+                   batch_size, 
+                   predict_questions, 
+                   predict_answers, 
+                   is_classification,
+                   beta1,
+                   beta2,
+                   epsilon):
+    neural = NN(input_size, inner_layers_amount, neurons_per_layer, output_size, inner_neuron_activation, last_layer_activation)
+    neural.initialize_optimizer(beta1, beta2, epsilon, learning_rate)
+    neural.train(epochs, training_questions, training_answers, batch_size)
+    neural.predict(predict_questions)
+    prediction_check(neural.prediction_outputs, predict_answers, is_classification)
+    # print(f"\nWeights:\n{neural.export_weights()}\n\nBiases:\n{neural.export_biases()}")
+    return neural
\ No newline at end of file
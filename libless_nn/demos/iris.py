@@ -0,0 +1,58 @@
+import random
+
+import numpy as np
+
+from ..numpy_backend import load_csv
+from .checks import one_hot_encoding, quantization_check, train_and_test
+
+# the Iris demo on the NumPy backend: python -m libless_nn.demos.iris
+
+
+class QuestionsAndAnswers():
+    def __init__(self, questions, answers, amount):
+        questions = np.asarray(questions)
+        answers = np.asarray(answers)
+        # Shuffle a permutation of the rows and split the data along it
+        order = np.random.permutation(len(questions))
+
+        self.training_data_questions = questions[order[:amount]]
+        self.training_data_answers = answers[order[:amount]]
+        self.prediction_data_questions = questions[order[amount:]]
+        self.prediction_data_answers = answers[order[amount:]]
+
+    def get_t_q(self):
+        return self.training_data_questions
+    def get_t_a(self):
+        return self.training_data_answers
+    def get_p_q(self):
+        return self.prediction_data_questions
+    def get_p_a(self):
+        return self.prediction_data_answers
+
+def main(path="Iris.csv"):
+    random.seed(0)
+    np.random.seed(0)
+    # labels are numbered in order of first appearance: setosa 0, versicolor 1, virginica 2
+    iris = load_csv(path, ["SepalLengthCm", "SepalWidthCm", "PetalLengthCm", "PetalWidthCm"], "Species")
+    iris_data = QuestionsAndAnswers(iris.features, one_hot_encoding(iris.labels,3), 99)
+    neural = train_and_test(input_size = 4, 
+                            inner_layers_amount = 3, 
+                            neurons_per_layer = 16, 
+                            output_size = 3, 
+                            inner_neuron_activation = "Leaky_ReLU", 
+                            last_layer_activation = "Sigmoid", 
+                            epochs = 10,
+                            learning_rate = 0.01,
+                            training_questions = iris_data.get_t_q(),
+                            training_answers = iris_data.get_t_a(),
+                            batch_size = 16,
+                            predict_questions = iris_data.get_p_q(),
+                            predict_answers = iris_data.get_p_a(),
+                            is_classification = True,
+                            beta1 = 0.9,
+                            beta2 = 0.999,
+                            epsilon = 1e-8)
+    quantization_check(neural, iris_data.get_t_q(), iris_data.get_p_q(), iris_data.get_p_a(), True)
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
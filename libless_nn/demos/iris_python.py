@@ -0,0 +1,121 @@
+import csv
+import random
+
+from ..python_backend import NN
+
+# the Iris demo on the pure Python backend: python -m libless_nn.demos.iris_python
+
+def one_hot_encoding(data, data_types):
+    output = []
+    for i in range(len(data)):
+        output.append([])
+        for j in range(data_types):
+            if j == data[i]:
+                output[i].append(1)
+            else:
+                output[i].append(0)
+    return(output)
+
+def read_iris(path="Iris.csv"):
+    questions = []
+    labels = []
+    with open(path, "r") as file:
+        csv_reader = csv.reader(file)
+        next(csv_reader)
+        for row in csv_reader:
+            feature_row = list(map(float, row[1:5]))
+            label = row[5]
+            questions.append(feature_row)
+            labels.append(label)
+    for i in range(len(questions)):
+        if labels[i] == "Iris-setosa":
+            labels[i] = 0
+        elif labels[i] == "Iris-versicolor":
+            labels[i] = 1
+        elif labels[i] == "Iris-virginica":
+            labels[i] = 2
+
+    return questions, labels
+
+
+class QuestionsAndAnswers():
+    def __init__(self, questions, answers, amount):
+        combined_data = list(zip(questions, answers))
+        # Shuffle the combined data
+        random.shuffle(combined_data)
+        # Split the shuffled data back into training_data and training_answers
+        questions, answers = zip(*combined_data)
+
+        self.training_data_questions = questions[:amount]
+        self.training_data_answers = answers[:amount]
+        self.prediction_data_questions = questions[amount:]
+        self.prediction_data_answers = answers[amount:]
+
+    def get_t_q(self):
+        return self.training_data_questions
+    def get_t_a(self):
+        return self.training_data_answers
+    def get_p_q(self):
+        return self.prediction_data_questions
+    def get_p_a(self):
+        return self.prediction_data_answers
+
+def prediction_check(prediction, actual, is_classification):
+        print(f"\nPredictions:\n{prediction}")
+        if actual != None:    
+            if is_classification == True:
+                total_correct = sum(1 for pred, actual_row in zip(prediction, actual) if pred.index(max(pred)) == actual_row.index(max(actual_row)))
+                print(f"\nTotal accuracy: {round((total_correct/len(prediction))*100,5)} %")
+            else:
+                losses = [sum(0.5 * (prediction[i][j] - actual[i][j]) ** 2 for j in range(len(prediction[0]))) / len(prediction[0]) for i in range(len(prediction))]
+                total_avg_loss = sum(losses)/len(losses)
+                print(f"\nMean loss: {round(total_avg_loss,5)}")
+                print(f"\nAll losses: \n{losses}")
+
+def train_and_test(input_size, 
+                   inner_layers_amount, 
+                   neurons_per_layer, 
+                   output_size, 
+                   inner_neuron_activation, 
+                   last_layer_activation, 
+                   epochs, learning_rate, 
+                   training_questions, 
+                   training_answers, 
+                   batch_size, 
+                   predict_questions, 
+                   predict_answers, 
+                   is_classification,
+                   beta1,
+                   beta2,
+                   epsilon):
+    neural = NN(input_size, inner_layers_amount, neurons_per_layer, output_size, inner_neuron_activation, last_layer_activation)
+    neural.initialize_optimizer(beta1, beta2, epsilon, learning_rate)
+    neural.train(epochs, training_questions, training_answers, batch_size)
+    neural.predict(predict_questions)
+    prediction_check(neural.prediction_outputs, predict_answers, is_classification)
+    # print(f"\nWeights:\n{neural.export_weights()}\n\nBiases:\n{neural.export_biases()}")
+
+def main(path="Iris.csv"):
+    random.seed(0)
+    questions, labels = read_iris(path)
+    iris_data = QuestionsAndAnswers(questions, one_hot_encoding(labels,3), 99)
+    train_and_test(input_size = 4, 
+                   inner_layers_amount = 2, 
+                   neurons_per_layer = 8, 
+                   output_size = 3, 
+                   inner_neuron_activation = "ReLU", 
+                   last_layer_activation = "Softmax", 
+                   epochs = 20,
+                   learning_rate = 0.01,
+                   training_questions = iris_data.get_t_q(),
+                   training_answers = iris_data.get_t_a(),
+                   batch_size = 16,
+                   predict_questions = iris_data.get_p_q(),
+                   predict_answers = iris_data.get_p_a(),
+                   is_classification = True,
+                   beta1 = 0.9,
+                   beta2 = 0.999,
+                   epsilon = 1e-8)
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
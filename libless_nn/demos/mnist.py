@@ -0,0 +1,48 @@
+import os
+import random
+
+import numpy as np
+
+from ..numpy_backend import MemmapDataset
+from .checks import one_hot_encoding, quantization_check, train_and_test
+
+# the MNIST demo on the NumPy backend: python -m libless_nn.demos.mnist
+
+def mnist_files(directory="."):
+    # raw uint8 images and labels, written once from keras and memory-mapped from then on
+    paths = {name: os.path.join(directory, f"mnist-{name}.u8") for name in ("train-images", "train-labels", "test-images", "test-labels")}
+    if not all(os.path.exists(path) for path in paths.values()):
+        from keras.datasets import mnist
+        (train_X, train_y), (test_X, test_y) = mnist.load_data()
+        for path, array in zip(paths.values(), (train_X, train_y, test_X, test_y)):
+            array.astype(np.uint8).tofile(path)
+    return paths
+
+def main(directory="."):
+    random.seed(0)
+    np.random.seed(0)
+    mnist_paths = mnist_files(directory)
+    train_data = MemmapDataset(mnist_paths["train-images"], mnist_paths["train-labels"], 784, 10, scale=1/255)
+    test_data = MemmapDataset(mnist_paths["test-images"], mnist_paths["test-labels"], 784, 10, scale=1/255)
+    y_test_one_hot = one_hot_encoding(test_data.labels, 10)
+    neural = train_and_test(input_size = 784, 
+                            inner_layers_amount = 2,
+                            neurons_per_layer = 16,
+                            output_size = 10, 
+                            inner_neuron_activation = "Leaky_ReLU", 
+                            last_layer_activation = "Softmax", 
+                            epochs = 20,
+                            learning_rate = 0.01,
+                            training_questions = train_data,
+                            training_answers = None,
+                            batch_size = 100,
+                            predict_questions = test_data.features,
+                            predict_answers = y_test_one_hot,
+                            is_classification = True,
+                            beta1 = 0.9,
+                            beta2 = 0.999,
+                            epsilon = 1e-8)
+    quantization_check(neural, train_data.features[:10000], test_data.features, y_test_one_hot, True)
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,69 @@
+import numpy as np
+
+# metrics added up chunk by chunk over the predictions, a handful of array operations per chunk whatever its size
+
+
+class Metrics:
+    def __init__(self, num_classes=None, loss_function="mse"):
+        # num_classes None is regression, there is only the loss then.
+        # loss_function is the one NN.train uses: "log" after Softmax, "mse" after anything else
+        self.num_classes = num_classes
+        self.loss_function = loss_function
+        self.reset()
+
+    def reset(self):
+        self.samples = 0
+        self.loss_sum = 0.0
+        self.confusion_matrix = None
+        if self.num_classes is not None:
+            self.confusion_matrix = np.zeros((self.num_classes, self.num_classes), dtype=np.int64)
+
+    def update(self, predictions, answers):
+        # answers are one-hot rows like the training answers, or the labels themselves
+        predictions = np.asarray(predictions, dtype=np.float64)
+        answers = np.asarray(answers)
+        if answers.ndim == 1:
+            labels = answers.astype(np.int64)
+            answers = np.eye(predictions.shape[1])[labels]
+        else:
+            labels = np.argmax(answers, axis=1)
+        if self.loss_function == "log":
+            self.loss_sum += float(-np.sum(answers * np.log(np.clip(predictions, 1e-15, 1 - 1e-15))))
+        else:
+            self.loss_sum += float(np.sum(np.mean(0.5 * np.square(predictions - answers), axis=1)))
+        if self.confusion_matrix is not None:
+            # rows are the actual classes, columns the predicted ones
+            cells = labels * self.num_classes + np.argmax(predictions, axis=1)
+            self.confusion_matrix += np.bincount(cells, minlength=self.num_classes ** 2).reshape(self.num_classes, self.num_classes)
+        self.samples += len(predictions)
+
+    def correct(self):
+        return int(np.trace(self.confusion_matrix))
+
+    def loss(self):
+        return self.loss_sum / self.samples
+
+    def accuracy(self):
+        return self.correct() / self.samples
+
+    def result(self, prefix=""):
+        # plain numbers and lists, ready for JSON
+        result = {f"{prefix}loss": self.loss()}
+        if self.confusion_matrix is not None:
+            result[f"{prefix}accuracy"] = self.accuracy()
+            result[f"{prefix}confusion_matrix"] = self.confusion_matrix.tolist()
+        return result
+
+
+def evaluate(network, questions, answers, metrics, chunk_size=1024):
+    # predictions chunk by chunk into metrics, one matrix per layer on the NumPy backends
+    if hasattr(network, "predict_chunks"):
+        start = 0
+        for outputs in network.predict_chunks(questions, chunk_size):
+            metrics.update(outputs, answers[start:start + len(outputs)])
+            start += len(outputs)
+        return metrics
+    for start in range(0, len(questions), chunk_size):
+        outputs = [network.forward_pass(sample) for sample in questions[start:start + chunk_size]]
+        metrics.update(outputs, answers[start:start + len(outputs)])
+    return metrics
\ No newline at end of file
@@ -0,0 +1,1107 @@
+import contextlib
+import csv
+import itertools
+import json
+import math
+import os
+import queue
+import random
+import threading
+
+import numpy as np
+
+from .callbacks import ProgressPrinter
+from .checkpoint import read_header, write_checkpoint
+
+
+class NoActivation:
+    def forward(self, x, out=None):
+        if out is not None and out is not x:
+            np.copyto(out, x)
+            return out, None
+        return x, None
+
+    def backward(self, grad, y, cache, out=None):
+        if out is not None and out is not grad:
+            np.copyto(out, grad)
+            return out
+        return grad
+
+
+class ReLU:
+    # the mask of the forward pass is the derivative, back_prop reuses it
+    def forward(self, x, out=None):
+        mask = np.greater_equal(x, 0)
+        return np.maximum(x, 0, out=out), mask
+
+    def backward(self, grad, y, cache, out=None):
+        return np.multiply(grad, cache, out=out)
+
+
+class LeakyReLU:
+    def __init__(self, slope=0.01):
+        self.slope = slope
+
+    def forward(self, x, out=None):
+        # the slopes take the dtype of x, a float64 mask would double the traffic of a float32 layer
+        slopes = np.where(x < 0, x.dtype.type(self.slope), x.dtype.type(1))
+        return np.multiply(x, slopes, out=out), slopes
+
+    def backward(self, grad, y, cache, out=None):
+        return np.multiply(grad, cache, out=out)
+
+
+class Sigmoid(NoActivation):
+    # backward is inherited: only used on the last layer, where the loss already returns the gradient before the activation
+    def forward(self, x, out=None):
+        out = np.negative(x, out=out)
+        np.exp(out, out=out)
+        out += 1
+        np.reciprocal(out, out=out)
+        return np.clip(out, 1e-15, 1 - 1e-15, out=out), None
+
+
+class Softmax(NoActivation):
+    # paired with the log loss, see Sigmoid
+    def forward(self, x, out=None):
+        out = np.subtract(x, np.max(x, axis=-1, keepdims=True), out=out)
+        np.exp(out, out=out)
+        out /= np.sum(out, axis=-1, keepdims=True)
+        return out, None
+
+
+class Tanh:
+    def forward(self, x, out=None):
+        return np.tanh(x, out=out), None
+
+    def backward(self, grad, y, cache, out=None):
+        # 1 - tanh^2, read back from the forward outputs
+        derivative = np.square(y)
+        np.subtract(1, derivative, out=derivative)
+        return np.multiply(grad, derivative, out=out)
+
+
+class GELU:
+    # tanh approximation, the derivative is built while the inputs are still around
+    def forward(self, x, out=None):
+        c = math.sqrt(2 / math.pi)
+        x_squared = np.square(x)
+        tanh_inner = np.tanh(c * x * (1 + 0.044715 * x_squared))
+        derivative = 0.5 * (1 + tanh_inner) + 0.5 * x * (1 - np.square(tanh_inner)) * c * (1 + 3 * 0.044715 * x_squared)
+        tanh_inner += 1
+        tanh_inner *= 0.5
+        return np.multiply(x, tanh_inner, out=out), derivative
+
+    def backward(self, grad, y, cache, out=None):
+        return np.multiply(grad, cache, out=out)
+
+
+ACTIVATIONS = {
+    "None": NoActivation(),
+    "ReLU": ReLU(),
+    "Leaky_ReLU": LeakyReLU(),
+    "Sigmoid": Sigmoid(),
+    "Softmax": Softmax(),
+    "Tanh": Tanh(),
+    "GELU": GELU(),
+}
+
+
+class Optimizer:
+    # updates parameters, moments and gradients in place, every buffer is allocated once in bind
+    state_names = ()
+
+    def __init__(self, learning_rate):
+        self.learning_rate = learning_rate
+        self.t = 0
+
+    def bind(self, parameters, gradients):
+        self.parameters = parameters
+        self.gradients = gradients
+        self.state = {name: [np.zeros_like(p) for p in parameters] for name in self.state_names}
+        # one scratch buffer shared by all parameters, viewed in the shape of each
+        scratch = np.empty(max(p.size for p in parameters), dtype=np.result_type(*parameters))
+        self.scratch = [scratch[:p.size].reshape(p.shape) for p in parameters]
+
+    def step(self, batch_size):
+        self.t += 1
+        self.prepare_step()
+        for i in range(len(self.parameters)):
+            gradient = self.gradients[i]
+            gradient *= 1 / batch_size
+            self.update(i, self.parameters[i], gradient, self.scratch[i])
+            gradient.fill(0)
+
+    def prepare_step(self):
+        pass
+
+    def update(self, i, parameter, gradient, scratch):
+        raise NotImplementedError
+
+
+class SGD(Optimizer):
+    state_names = ("velocity",)
+
+    def __init__(self, learning_rate, momentum=0.9):
+        super().__init__(learning_rate)
+        self.momentum = momentum
+
+    def update(self, i, parameter, gradient, scratch):
+        velocity = self.state["velocity"][i]
+        velocity *= self.momentum
+        velocity += gradient
+        np.multiply(velocity, self.learning_rate, out=scratch)
+        parameter -= scratch
+
+
+class RMSprop(Optimizer):
+    state_names = ("v",)
+
+    def __init__(self, learning_rate, rho=0.999, epsilon=1e-8):
+        super().__init__(learning_rate)
+        self.rho = rho
+        self.epsilon = epsilon
+
+    def update(self, i, parameter, gradient, scratch):
+        v = self.state["v"][i]
+        v *= self.rho
+        np.multiply(gradient, gradient, out=scratch)
+        scratch *= 1 - self.rho
+        v += scratch
+        np.sqrt(v, out=scratch)
+        scratch += self.epsilon
+        np.divide(gradient, scratch, out=scratch)
+        scratch *= self.learning_rate
+        parameter -= scratch
+
+
+class Adam(Optimizer):
+    state_names = ("m", "v")
+
+    def __init__(self, learning_rate, beta1=0.9, beta2=0.999, epsilon=1e-8):
+        super().__init__(learning_rate)
+        self.beta1 = beta1
+        self.beta2 = beta2
+        self.epsilon = epsilon
+
+    def prepare_step(self):
+        # bias corrections are scalars, worked out once per step instead of once per array
+        self.m_correction = 1 / (1 - self.beta1 ** self.t)
+        self.v_correction = 1 / (1 - self.beta2 ** self.t)
+
+    def update(self, i, parameter, gradient, scratch):
+        m = self.state["m"][i]
+        v = self.state["v"][i]
+        m *= self.beta1
+        np.multiply(gradient, 1 - self.beta1, out=scratch)
+        m += scratch
+        v *= self.beta2
+        np.multiply(gradient, gradient, out=scratch)
+        scratch *= 1 - self.beta2
+        v += scratch
+        np.multiply(v, self.v_correction, out=scratch)
+        np.sqrt(scratch, out=scratch)
+        scratch += self.epsilon
+        np.divide(m, scratch, out=scratch)
+        scratch *= self.learning_rate * self.m_correction
+        parameter -= scratch
+
+
+class AdamW(Adam):
+    def __init__(self, learning_rate, beta1=0.9, beta2=0.999, epsilon=1e-8, weight_decay=0.01):
+        super().__init__(learning_rate, beta1, beta2, epsilon)
+        self.weight_decay = weight_decay
+
+    def update(self, i, parameter, gradient, scratch):
+        # decoupled weight decay, applied before the Adam step
+        parameter *= 1 - self.learning_rate * self.weight_decay
+        super().update(i, parameter, gradient, scratch)
+
+
+def make_optimizer(optimizer_type, beta1, beta2, epsilon, learning_rate, weight_decay=0.01):
+    if optimizer_type == "Adam":
+        return Adam(learning_rate, beta1, beta2, epsilon)
+    elif optimizer_type == "AdamW":
+        return AdamW(learning_rate, beta1, beta2, epsilon, weight_decay)
+    elif optimizer_type == "SGD":
+        return SGD(learning_rate, momentum=beta1)
+    elif optimizer_type == "RMSprop":
+        return RMSprop(learning_rate, rho=beta2, epsilon=epsilon)
+    raise ValueError(f"Unknown optimizer: {optimizer_type}")
+
+
+class Dataset:
+    # features and answers kept as contiguous arrays, mini-batches are gathered out of them by index
+    def __init__(self, features, answers, dtype=None):
+        # cast once here, every batch gathered afterwards is already in the dtype the network computes in
+        self.features = np.ascontiguousarray(features, dtype=dtype)
+        self.answers = np.ascontiguousarray(answers, dtype=dtype)
+        if len(self.features) != len(self.answers):
+            raise ValueError(f"{len(self.features)} feature rows but {len(self.answers)} answers")
+
+    def __len__(self):
+        return len(self.features)
+
+    def batch_buffers(self, batch_size):
+        return (np.empty((batch_size,) + self.features.shape[1:], dtype=self.features.dtype),
+                np.empty((batch_size,) + self.answers.shape[1:], dtype=self.answers.dtype))
+
+    def gather(self, indices, out=None):
+        # out is a pair from batch_buffers, filled in place instead of allocating a new batch
+        if out is None:
+            return self.features[indices], self.answers[indices]
+        features = np.take(self.features, indices, axis=0, out=out[0][:len(indices)])
+        answers = np.take(self.answers, indices, axis=0, out=out[1][:len(indices)])
+        return features, answers
+
+
+class RandomSampler:
+    # only the permutation of the row indices is shuffled, the data never moves
+    def __init__(self, size, batch_size):
+        self.order = np.arange(size)
+        self.batch_size = batch_size
+
+    def shuffle(self):
+        np.random.shuffle(self.order)
+
+    def batches(self, start=0):
+        for j in range(start, len(self.order), self.batch_size):
+            yield j, self.order[j:j + self.batch_size]
+
+
+class ScaledRows:
+    # rows of an on-disk array, read, cast and scaled only for the slice or indices asked for
+    def __init__(self, raw, scale=1.0, dtype=np.float64):
+        self.raw = raw
+        self.scale = scale
+        self.dtype = np.dtype(dtype)
+
+    def __len__(self):
+        return len(self.raw)
+
+    def __getitem__(self, index):
+        return np.multiply(self.raw[index], self.scale, dtype=self.dtype)
+
+    def row_buffer(self, rows):
+        return np.empty((rows,) + self.raw.shape[1:], dtype=self.dtype)
+
+    def read_rows(self, start, end, out=None):
+        if out is not None:
+            out = out[:end - start]
+        return np.multiply(self.raw[start:end], self.scale, out=out, dtype=self.dtype)
+
+
+class MemmapDataset:
+    # Dataset over raw files on disk, e.g. uint8 images and integer labels. Only the rows of the current
+    # mini-batch are read; they are normalized and the labels one-hot expanded into the batch buffers,
+    # so memory use follows batch_size and not the size of the files
+    def __init__(self, features_path, labels_path, feature_size, num_classes, features_dtype=np.uint8,
+                 labels_dtype=np.uint8, scale=1.0, dtype=np.float64):
+        self.arguments = (features_path, labels_path, feature_size, num_classes, features_dtype, labels_dtype, scale, dtype)
+        self.raw_features = np.memmap(features_path, dtype=features_dtype, mode="r").reshape(-1, feature_size)
+        self.labels = np.memmap(labels_path, dtype=labels_dtype, mode="r")
+        if len(self.raw_features) != len(self.labels):
+            raise ValueError(f"{len(self.raw_features)} feature rows but {len(self.labels)} labels")
+        self.features = ScaledRows(self.raw_features, scale, dtype)
+        self.num_classes = num_classes
+        self.scale = scale
+        self.dtype = np.dtype(dtype)
+
+    def __reduce__(self):
+        # worker processes map the files themselves instead of receiving a copy of the data
+        return (MemmapDataset, self.arguments)
+
+    def __len__(self):
+        return len(self.labels)
+
+    def batch_buffers(self, batch_size):
+        return (np.empty((batch_size, self.raw_features.shape[1]), dtype=self.dtype),
+                np.empty((batch_size, self.num_classes), dtype=self.dtype),
+                np.empty((batch_size, self.raw_features.shape[1]), dtype=self.raw_features.dtype))
+
+    def gather(self, indices, out=None):
+        if out is None:
+            out = self.batch_buffers(len(indices))
+        rows = len(indices)
+        # visiting the rows in file order keeps the reads sequential, the order inside a batch does not matter
+        indices = np.sort(indices)
+        raw = np.take(self.raw_features, indices, axis=0, out=out[2][:rows])
+        features = np.multiply(raw, self.scale, out=out[0][:rows])
+        answers = out[1][:rows]
+        answers.fill(0)
+        answers[np.arange(rows), self.labels[indices]] = 1
+        return features, answers
+
+
+class Prefetcher:
+    # prepares the next depth items on a background thread, each into one of a fixed set of reused buffers.
+    # A buffer goes back to the thread once the consumer has moved on to the following item
+    def __init__(self, items, prepare, make_buffers, depth=2):
+        self.prepare = prepare
+        self.free = queue.Queue()
+        for _ in range(depth + 2):
+            self.free.put(make_buffers())
+        self.ready = queue.Queue(maxsize=depth)
+        self.stopped = False
+        self.thread = threading.Thread(target=self.run, args=(iter(items),), daemon=True)
+        self.thread.start()
+
+    def run(self, items):
+        try:
+            for item in items:
+                buffers = self.free.get()
+                if self.stopped:
+                    return
+                self.ready.put((item, self.prepare(item, buffers), buffers))
+            self.ready.put(None)
+        except BaseException as error:
+            self.ready.put(error)
+
+    def __iter__(self):
+        # buffers may be None when prepare makes its own arrays, they still go back so the thread keeps going
+        holding, in_use = False, None
+        while True:
+            entry = self.ready.get()
+            if holding:
+                self.free.put(in_use)
+                holding, in_use = False, None
+            if entry is None:
+                return
+            if isinstance(entry, BaseException):
+                raise entry
+            item, prepared, in_use = entry
+            holding = True
+            yield item, prepared
+
+    def close(self):
+        self.stopped = True
+        # wake the thread if it is waiting for a buffer, and keep taking what it puts out until it stops
+        self.free.put(None)
+        while self.thread.is_alive():
+            try:
+                self.ready.get(timeout=0.1)
+            except queue.Empty:
+                pass
+
+
+def prediction_chunks(data_to_predict, chunk_size, prefetch=None):
+    # ((start, end), rows) for every chunk, read ahead on a background thread when prefetch is set
+    bounds = [(start, min(start + chunk_size, len(data_to_predict))) for start in range(0, len(data_to_predict), chunk_size)]
+    if prefetch:
+        if hasattr(data_to_predict, "read_rows"):
+            return Prefetcher(bounds, lambda item, out: data_to_predict.read_rows(*item, out=out),
+                              lambda: data_to_predict.row_buffer(chunk_size), prefetch)
+        return Prefetcher(bounds, lambda item, out: np.asarray(data_to_predict[item[0]:item[1]]), lambda: None, prefetch)
+    return (((start, end), data_to_predict[start:end]) for start, end in bounds)
+
+
+def predict_in_chunks(forward_pass, data_to_predict, output_size, dtype, chunk_size, prefetch=None):
+    # whole chunks go through each layer as one matrix, straight into the preallocated outputs
+    outputs = np.empty((len(data_to_predict), output_size), dtype=dtype)
+    with contextlib.closing(prediction_chunks(data_to_predict, chunk_size, prefetch)) as chunks:
+        for (start, end), chunk in chunks:
+            forward_pass(chunk, out=outputs[start:end])
+    return outputs
+
+
+def outputs_by_chunk(forward_pass, data_to_predict, chunk_size):
+    # yields the outputs chunk by chunk, so any iterable of rows is scored in constant memory
+    if hasattr(data_to_predict, "__getitem__") and hasattr(data_to_predict, "__len__"):
+        for start in range(0, len(data_to_predict), chunk_size):
+            yield forward_pass(data_to_predict[start:start + chunk_size])
+        return
+    rows = iter(data_to_predict)
+    while True:
+        chunk = list(itertools.islice(rows, chunk_size))
+        if not chunk:
+            return
+        yield forward_pass(chunk)
+
+
+class TabularData:
+    def __init__(self, features, labels, vocabulary, feature_names):
+        self.features = features
+        self.labels = labels
+        self.vocabulary = vocabulary
+        self.feature_names = feature_names
+
+    def column(self, name):
+        return self.features[:, self.feature_names.index(name)]
+
+    def one_hot(self, dtype=np.float64):
+        output = np.zeros((len(self.labels), len(self.vocabulary)), dtype=dtype)
+        output[np.arange(len(self.labels)), self.labels] = 1
+        return output
+
+    def dataset(self, one_hot=True):
+        return Dataset(self.features, self.one_hot(self.features.dtype) if one_hot else self.labels)
+
+
+def load_csv(path, feature_columns, label_column, dtype=np.float64, chunk_size=65536, cache=False):
+    # parses the file chunk_size lines at a time straight into one preallocated array, labels become
+    # integers in order of first appearance. cache=True keeps the result in a .npz next to the file, a path
+    # puts it there instead, and it is reused for as long as the file keeps its size and modification time.
+    # A cache that cannot be read is parsed over, one that cannot be written is skipped
+    with open(path, newline="") as file:
+        header = next(csv.reader(file))
+    feature_indices = [header.index(c) if isinstance(c, str) else c for c in feature_columns]
+    label_index = header.index(label_column) if isinstance(label_column, str) else label_column
+    feature_names = [header[i] for i in feature_indices]
+    stat = os.stat(path)
+    fingerprint = json.dumps([stat.st_size, stat.st_mtime_ns, feature_indices, label_index, np.dtype(dtype).str])
+    cache_path = f"{path}.npz" if cache is True else cache
+    if cache and os.path.exists(cache_path):
+        try:
+            with np.load(cache_path) as cached:
+                if "fingerprint" in cached.files and str(cached["fingerprint"]) == fingerprint:
+                    return TabularData(cached["features"], cached["labels"], cached["vocabulary"].tolist(), feature_names)
+        except (OSError, ValueError):
+            pass
+
+    with open(path, "rb") as file:
+        line_count = sum(block.count(b"\n") for block in iter(lambda: file.read(1 << 20), b"")) + 1
+    features = np.empty((line_count, len(feature_indices)), dtype=dtype)
+    labels = np.empty(line_count, dtype=np.int64)
+    vocabulary = {}
+    rows = 0
+    with open(path, newline="") as file:
+        next(file)
+        while True:
+            lines = list(itertools.islice(file, chunk_size))
+            if not lines:
+                break
+            # a chunk of nothing but blank lines is skipped, only the end of the file ends the parse
+            lines = [line for line in lines if line.strip()]
+            if not lines:
+                continue
+            chunk = np.loadtxt(lines, delimiter=",", quotechar='"', usecols=feature_indices, dtype=dtype, ndmin=2)
+            features[rows:rows + len(chunk)] = chunk
+            names = np.loadtxt(lines, delimiter=",", quotechar='"', usecols=[label_index], dtype=str, ndmin=1)
+            unique_names, first_seen, inverse = np.unique(names, return_index=True, return_inverse=True)
+            for name in unique_names[np.argsort(first_seen)]:
+                vocabulary.setdefault(str(name), len(vocabulary))
+            codes = np.array([vocabulary[str(name)] for name in unique_names], dtype=np.int64)
+            labels[rows:rows + len(chunk)] = codes[inverse]
+            rows += len(chunk)
+    data = TabularData(features[:rows], labels[:rows], list(vocabulary), feature_names)
+    if cache:
+        try:
+            with open(f"{cache_path}.tmp", "wb") as file:
+                np.savez(file, features=data.features, labels=data.labels, vocabulary=np.array(data.vocabulary),
+                         fingerprint=np.array(fingerprint))
+            os.replace(f"{cache_path}.tmp", cache_path)
+        except OSError:
+            # a read-only or shared data directory, the parsed data is just as good without the cache
+            if os.path.exists(f"{cache_path}.tmp"):
+                os.remove(f"{cache_path}.tmp")
+    return data
+
+
+class Layer:
+    def __init__(self, previous_height, height, activation_function_type, initialize=True):
+        self.shape = (height, previous_height)
+        self.parameter_count = height * (previous_height + 1)
+        if initialize:
+            self.biases = np.array([1 * (random.random() * 2 - 1) for n in range(height)])
+            self.weights = np.array([[(1 * (random.random()) * 2 - 1) for n in range(previous_height)] for m in range(height)])
+        else:
+            # nothing is allocated, the values are views into whatever buffer NN.bind_parameters is given
+            self.biases = self.weights = None
+        self.activation_function_type = activation_function_type
+        self.activation = ACTIVATIONS[activation_function_type]
+
+    def parameter_views(self, buffer):
+        # this layer's weights and biases inside any buffer laid out like NN.parameters
+        weights_end = self.offset + self.shape[0] * self.shape[1]
+        return (buffer[self.offset:weights_end].reshape(self.shape),
+                buffer[weights_end:self.offset + self.parameter_count])
+
+    def bind_buffers(self, parameters, gradients, offset, copy=True):
+        self.offset = offset
+        weights, biases = self.parameter_views(parameters)
+        if copy:
+            weights[...] = self.weights
+            biases[...] = self.biases
+        self.weights, self.biases = weights, biases
+        self.delta_weights, self.delta_biases = self.parameter_views(gradients)
+        return offset + self.parameter_count
+
+    def forward(self, previous_layer_outputs):
+        self.previous_layer_outputs = previous_layer_outputs
+        self.outputs = np.dot(previous_layer_outputs,self.weights.T) + self.biases
+        
+    def infer(self, previous_layer_outputs, out=None):
+        # forward and activation without touching the training state of the layer
+        outputs = np.dot(previous_layer_outputs, self.weights.T, out=out)
+        outputs += self.biases
+        return self.activation.forward(outputs, out=outputs)[0]
+
+    def activation_function(self):
+        # works on a single sample or on a (batch_size, height) matrix, in place on the fresh outputs of forward
+        self.post_activation_outputs, self.activation_cache = self.activation.forward(self.outputs, out=self.outputs)
+
+    def loss(self, predicted_list, expected_list, loss_type):
+        # mean_loss is the per-sample loss averaged over the rows of the batch
+        self.loss_type = loss_type
+
+        if self.loss_type == "mse":
+            errors = predicted_list - expected_list
+            self.mean_loss = np.mean(0.5 * np.square(errors))
+            self.d_loss = errors
+
+        elif self.loss_type == "log":
+            epsilon = 1e-15
+            predicted_list = np.clip(predicted_list, epsilon, 1 - epsilon)
+            self.mean_loss = -np.mean(np.sum(expected_list * np.log(predicted_list), axis=-1))
+            self.d_loss = predicted_list - expected_list
+
+    def back_prop(self, inputted_loss_array):
+        self.passed_on_loss_array = self.activation.backward(inputted_loss_array, self.post_activation_outputs, self.activation_cache)
+
+        # one GEMM sums the per-sample outer products of the whole batch
+        passed_on_loss_rows = np.reshape(self.passed_on_loss_array, (-1, len(self.biases)))
+        previous_layer_rows = np.reshape(self.previous_layer_outputs, (-1, self.weights.shape[1]))
+        self.delta_biases += np.sum(passed_on_loss_rows, axis=0)
+        self.delta_weights += np.dot(passed_on_loss_rows.T, previous_layer_rows)
+        self.loss_to_pass = np.dot(self.passed_on_loss_array, self.weights)
+
+
+class NN:
+    # a profiling.Profiler while one is attached, NN.train reports every epoch to it
+    profiler = None
+    # set by a callback, see callbacks.EarlyStopping, NN.train stops after the epoch it was set in
+    stop_training = False
+    # what schedules multiply their rate by, cut by schedules.ReduceOnPlateau so a schedule does not undo its cuts
+    learning_rate_scale = 1.0
+
+    def __init__(self, input_size, inner_layers_number, height, output_size, inner_layer_activation, last_layer_activation,
+                 dtype=np.float64, storage_dtype=None):
+        self.inner_layer_activation = inner_layer_activation
+        self.last_layer_activation = last_layer_activation
+        # dtype is what the network trains and predicts in, storage_dtype what frozen and saved weights are kept in.
+        # float16 storage keeps the float32 parameters as master copies, see checkpoint_contents and InferenceModel
+        self.dtype = np.dtype(dtype)
+        self.storage_dtype = self.dtype if storage_dtype is None else np.dtype(storage_dtype)
+        # the first and last layers draw their starting values before the inner ones, as they always have
+        first_layer = Layer(input_size, height, inner_layer_activation)
+        last_layer = Layer(height, output_size, last_layer_activation)
+        self.layers = [first_layer] + [Layer(height, height, inner_layer_activation) for i in range(inner_layers_number)] + [last_layer]
+        self.bind_parameters()
+
+    def bind_parameters(self, parameters=None, gradients=None):
+        # every layer's weights and biases are views into one contiguous buffer, same for the gradients.
+        # A new gradient buffer is left to np.zeros, which takes no memory until training writes to it
+        parameter_count = sum(layer.parameter_count for layer in self.layers)
+        copy = parameters is None
+        self.parameters = np.empty(parameter_count, dtype=self.dtype) if parameters is None else parameters
+        if gradients is None:
+            self.gradients = np.zeros(parameter_count, dtype=self.dtype)
+        else:
+            self.gradients = gradients
+            self.gradients.fill(0)
+        offset = 0
+        for layer in self.layers:
+            offset = layer.bind_buffers(self.parameters, self.gradients, offset, copy)
+        if hasattr(self, "optimizer"):
+            self.optimizer.parameters = [self.parameters]
+            self.optimizer.gradients = [self.gradients]
+
+    def initialize_optimizer(self, beta1, beta2, epsilon, learning_rate, optimizer="Adam", weight_decay=0.01):
+        # one optimizer steps the whole network over the flat buffers
+        self.optimizer_config = {"beta1": beta1, "beta2": beta2, "epsilon": epsilon, "learning_rate": learning_rate,
+                                 "optimizer": optimizer, "weight_decay": weight_decay}
+        self.optimizer = make_optimizer(optimizer, beta1, beta2, epsilon, learning_rate, weight_decay)
+        self.optimizer.bind([self.parameters], [self.gradients])
+        for layer in self.layers:
+            for name, buffers in self.optimizer.state.items():
+                weights, biases = layer.parameter_views(buffers[0])
+                setattr(layer, f"{name}_weights", weights)
+                setattr(layer, f"{name}_biases", biases)
+
+    @property
+    def learning_rate(self):
+        # the one rate the optimizer steps every parameter with, schedules change it between steps through here
+        return self.optimizer.learning_rate
+
+    @learning_rate.setter
+    def learning_rate(self, rate):
+        self.optimizer.learning_rate = rate
+
+    def snapshot(self):
+        # a copy of every weight and bias, for restore
+        return self.parameters.copy()
+
+    def restore(self, snapshot):
+        self.parameters[...] = snapshot
+
+    def update_w_and_b(self, batch_size):
+        self.optimizer.step(batch_size)
+
+    def compute_gradients(self, batch_data, batch_answers, loss_function):
+        #forward and activation through every layer, a network can be a single layer
+        outputs = batch_data
+        for layer in self.layers:
+            layer.forward(outputs)
+            layer.activation_function()
+            outputs = layer.post_activation_outputs
+        #now for loss
+        self.layers[-1].loss(self.layers[-1].post_activation_outputs, batch_answers, loss_function)
+        #now for back prop
+        self.layers[-1].back_prop(self.layers[-1].d_loss)
+        for l in range(len(self.layers)-1):
+            self.layers[-l-2].back_prop(self.layers[-l-1].loss_to_pass)
+        return self.layers[-1].mean_loss
+
+    def train(self, epochs, training_data, training_answers, batch_size,
+              checkpoint_path=None, checkpoint_every=1, checkpoint_unit="epochs", resume=False, workers=None, prefetch=None,
+              callbacks=None):
+        # checkpoint_unit is "epochs" or "steps", resume picks up from checkpoint_path when it exists,
+        # workers > 1 shards every mini-batch over that many processes,
+        # prefetch prepares that many mini-batches ahead on a background thread
+        # training_data can also be a Dataset or MemmapDataset, training_answers is ignored then
+        # callbacks hear about every batch and epoch, see callbacks.Callback; without any the progress is printed
+        callbacks = [ProgressPrinter()] if callbacks is None else callbacks
+        self.stop_training = False
+        loss_function = "log" if self.last_layer_activation == "Softmax" else "mse"
+        dataset = training_data if hasattr(training_data, "gather") else Dataset(training_data, training_answers, self.dtype)
+        sampler = RandomSampler(len(dataset), batch_size)
+        start_epoch, start_batch, current_epoch_loss = 0, 0, 0
+        if resume and checkpoint_path is not None and os.path.exists(checkpoint_path):
+            start_epoch, start_batch, current_epoch_loss, sampler.order[...] = self.restore_training_state(checkpoint_path)
+        batch_buffers = dataset.batch_buffers(batch_size)
+        checkpoint_writer = CheckpointWriter()
+        data_parallel = None
+        if workers is not None and workers > 1:
+            data_parallel = DataParallelTrainer(self, workers, dataset, loss_function)
+        for callback in callbacks:
+            callback.on_train_begin(self)
+        try:
+            for current_epoch in range(start_epoch, epochs):
+                if self.profiler is not None:
+                    self.profiler.start_epoch()
+                if current_epoch != start_epoch or start_batch == 0:
+                    current_epoch_loss = 0
+                    # Shuffle the order the samples are visited in
+                    sampler.shuffle()
+                if self.profiler is not None:
+                    self.profiler.mark("shuffle")
+                batches = sampler.batches(start_batch if current_epoch == start_epoch else 0)
+                if data_parallel is not None:
+                    # the workers gather their own shards
+                    batches = ((batch, None) for batch in batches)
+                elif prefetch:
+                    batches = Prefetcher(batches, lambda batch, out: dataset.gather(batch[1], out=out),
+                                         lambda: dataset.batch_buffers(batch_size), prefetch)
+                else:
+                    batches = ((batch, dataset.gather(batch[1], out=batch_buffers)) for batch in batches)
+                with contextlib.closing(batches):
+                    for (j, batch_indices), batch in batches:
+                        if data_parallel is not None:
+                            batch_loss = data_parallel.compute_gradients(batch_indices)
+                        else:
+                            batch_loss = self.compute_gradients(batch[0], batch[1], loss_function)
+                        current_epoch_loss += batch_loss * len(batch_indices)
+                        self.update_w_and_b(batch_size)
+                        for callback in callbacks:
+                            callback.on_batch_end(self, current_epoch + 1, j // batch_size, batch_loss)
+                        if checkpoint_path is not None and checkpoint_unit == "steps" and self.optimizer.t % checkpoint_every == 0:
+                            checkpoint_writer.write(checkpoint_path, *self.training_checkpoint(current_epoch, j + batch_size, current_epoch_loss, sampler.order))
+                if self.profiler is not None:
+                    self.profiler.end_epoch(current_epoch + 1, len(dataset), current_epoch_loss/len(dataset))
+                logs = {"epoch": current_epoch + 1, "epochs": epochs, "loss": current_epoch_loss/len(dataset)}
+                for callback in callbacks:
+                    callback.on_epoch_end(self, current_epoch + 1, logs)
+                if checkpoint_path is not None and checkpoint_unit == "epochs" and (current_epoch + 1) % checkpoint_every == 0:
+                    checkpoint_writer.write(checkpoint_path, *self.training_checkpoint(current_epoch + 1, 0, 0, sampler.order))
+                if self.stop_training:
+                    break
+        finally:
+            if data_parallel is not None:
+                data_parallel.close()
+            checkpoint_writer.wait()
+            for callback in callbacks:
+                callback.on_train_end(self)
+
+    def training_checkpoint(self, epoch, batch, epoch_loss, order):
+        # copies of everything needed to carry on exactly from (epoch, batch), taken before the write goes to the background
+        header, buffers = self.checkpoint_contents(copy=True, master=True)
+        numpy_random_state = np.random.get_state()
+        python_random_state = random.getstate()
+        header["training"] = {
+            "epoch": epoch,
+            "batch": batch,
+            "epoch_loss": float(epoch_loss),
+            "python_random_state": [python_random_state[0], list(python_random_state[1]), python_random_state[2]],
+            "numpy_random_state": [numpy_random_state[0]] + list(numpy_random_state[2:]),
+        }
+        buffers["order"] = np.array(order, dtype=np.int64)
+        buffers["numpy_random_keys"] = numpy_random_state[1].copy()
+        return header, buffers
+
+    def restore_training_state(self, path):
+        header, blobs = read_checkpoint(path)
+        if blobs["parameters"].size != self.parameters.size:
+            raise ValueError(f"{path} holds {blobs['parameters'].size} parameters, this network has {self.parameters.size}")
+        self.parameters[...] = blobs["parameters"]
+        self.optimizer.t = header["optimizer"]["t"]
+        for name, state in self.optimizer.state.items():
+            state[0][...] = blobs[name]
+        training = header["training"]
+        version, internal_state, gauss_next = training["python_random_state"]
+        random.setstate((version, tuple(internal_state), gauss_next))
+        bit_generator, position, has_gauss, cached_gaussian = training["numpy_random_state"]
+        np.random.set_state((bit_generator, np.array(blobs["numpy_random_keys"]), position, has_gauss, cached_gaussian))
+        return training["epoch"], training["batch"], training["epoch_loss"], blobs["order"]
+
+    def forward_pass(self, data, out=None):
+        outputs = np.asarray(data, dtype=self.dtype)
+        for layer in self.layers[:-1]:
+            outputs = layer.infer(outputs)
+        return self.layers[-1].infer(outputs, out=out)
+
+    def predict(self, data_to_predict, chunk_size=1024, prefetch=None):
+        self.prediction_outputs = predict_in_chunks(self.forward_pass, data_to_predict, len(self.layers[-1].biases),
+                                                    self.dtype, chunk_size, prefetch)
+        return self.prediction_outputs
+
+    def predict_chunks(self, data_to_predict, chunk_size=1024):
+        return outputs_by_chunk(self.forward_pass, data_to_predict, chunk_size)
+
+    def export_weights(self):
+        # a single copy of the flat buffer, handed out as per-layer views
+        parameters = self.parameters.copy()
+        return [layer.parameter_views(parameters)[0] for layer in self.layers]
+
+    def export_biases(self):
+        parameters = self.parameters.copy()
+        return [layer.parameter_views(parameters)[1] for layer in self.layers]
+
+    def freeze(self):
+        return InferenceModel(self)
+
+    def checkpoint_contents(self, copy=False, master=False):
+        # the parameters go out in storage_dtype, unless master asks for the full precision ones to train on from
+        header = {
+            "inner_layer_activation": self.inner_layer_activation,
+            "last_layer_activation": self.last_layer_activation,
+            "dtype": self.dtype.name,
+            "storage_dtype": self.storage_dtype.name,
+            "layers": [{"inputs": layer.weights.shape[1], "units": layer.weights.shape[0],
+                        "activation": layer.activation_function_type} for layer in self.layers],
+            "optimizer": None,
+        }
+        buffers = {"parameters": self.parameters}
+        if not master and self.storage_dtype != self.dtype:
+            buffers["parameters"] = self.parameters.astype(self.storage_dtype)
+        if hasattr(self, "optimizer"):
+            header["optimizer"] = dict(self.optimizer_config, t=self.optimizer.t)
+            for name, state in self.optimizer.state.items():
+                buffers[name] = state[0]
+        if copy:
+            buffers = {name: buffer.copy() for name, buffer in buffers.items()}
+        return header, buffers
+
+    def save(self, path):
+        write_checkpoint(path, *self.checkpoint_contents())
+
+    @classmethod
+    def from_header(cls, header):
+        # the layers of a checkpoint header, not yet bound to any buffers and holding no memory of their own
+        network = cls.__new__(cls)
+        network.inner_layer_activation = header["inner_layer_activation"]
+        network.last_layer_activation = header["last_layer_activation"]
+        network.dtype = np.dtype(header.get("dtype", "float64"))
+        network.storage_dtype = np.dtype(header.get("storage_dtype", network.dtype))
+        network.layers = [Layer(spec["inputs"], spec["units"], spec["activation"], initialize=False) for spec in header["layers"]]
+        return network
+
+    @classmethod
+    def from_layers(cls, header, values):
+        # a network of any shape: a header like the checkpoints' and the starting (weights, biases) of every layer,
+        # weights row by row. See builder.sequential, which checks that they fit together
+        network = cls.from_header(header)
+        parameters = np.empty(sum(layer.parameter_count for layer in network.layers), dtype=network.dtype)
+        offset = 0
+        for layer, (weights, biases) in zip(network.layers, values):
+            parameters[offset:offset + layer.parameter_count] = np.concatenate([np.ravel(weights), biases])
+            offset += layer.parameter_count
+        network.bind_parameters(parameters)
+        return network
+
+    @classmethod
+    def load(cls, path, mmap_mode="c"):
+        # the parameters stay memory-mapped: nothing is read until it is used and the pages are shared
+        # between processes that load the same file. "c" keeps them trainable (copy on write), "r" is read-only
+        header, blobs = read_checkpoint(path, mmap_mode)
+        network = cls.from_header(header)
+        parameters = blobs["parameters"]
+        if parameters.dtype != network.dtype:
+            # stored in float16, training carries on from master copies in the compute dtype
+            parameters = parameters.astype(network.dtype)
+        network.bind_parameters(parameters)
+        if header["optimizer"] is not None:
+            optimizer_config = dict(header["optimizer"])
+            t = optimizer_config.pop("t")
+            network.initialize_optimizer(**optimizer_config)
+            network.optimizer.t = t
+            for name, state in network.optimizer.state.items():
+                state[0][...] = blobs[name]
+        return network
+
+
+class PerSampleNN(NN):
+    # the "numpy" backend: each sample of a mini-batch goes through the network on its own and the gradients
+    # add up over the batch, the way the first NumPy version trained. NN gets the same result with one matrix per layer
+    def compute_gradients(self, batch_data, batch_answers, loss_function):
+        loss_sum = 0
+        for sample, answer in zip(batch_data, batch_answers):
+            loss_sum += super().compute_gradients(sample, answer, loss_function)
+        return loss_sum / len(batch_data)
+
+
+class CheckpointWriter:
+    # writes checkpoints on a background thread, one at a time, so training does not wait on the disk
+    def __init__(self):
+        self.thread = None
+        self.error = None
+
+    def write(self, path, header, buffers):
+        self.wait()
+        self.thread = threading.Thread(target=self.run, args=(path, header, buffers), daemon=True)
+        self.thread.start()
+
+    def run(self, path, header, buffers):
+        try:
+            write_checkpoint(path, header, buffers)
+        except BaseException as error:
+            self.error = error
+
+    def wait(self):
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+        if self.error is not None:
+            error, self.error = self.error, None
+            raise error
+
+
+def read_checkpoint(path, mmap_mode="c"):
+    header, header_end = read_header(path)
+    blobs = {}
+    for blob in header["blobs"]:
+        if blob["count"] == 0:
+            blobs[blob["name"]] = np.empty(0, dtype=blob["dtype"])
+        else:
+            blobs[blob["name"]] = np.memmap(path, dtype=blob["dtype"], mode=mmap_mode,
+                                            offset=header_end + blob["offset"], shape=(blob["count"],))
+    return header, blobs
+
+
+class InferenceModel:
+    # read-only snapshot of a trained NN, safe to predict with from many threads at once
+    def __init__(self, network, copy=True):
+        if network.parameters.dtype != network.storage_dtype:
+            parameters = network.parameters.astype(network.storage_dtype)
+        else:
+            parameters = network.parameters.copy() if copy else network.parameters.view()
+        self.bind(parameters, [(layer.shape, layer.activation_function_type) for layer in network.layers], network.dtype)
+
+    def bind(self, parameters, shapes, dtype):
+        # (weights, biases, activation) views into parameters for every ((units, inputs), activation) in shapes
+        self.parameters = parameters
+        self.parameters.flags.writeable = False
+        self.layers = []
+        offset = 0
+        for (units, inputs), activation in shapes:
+            weights = self.parameters[offset:offset + units * inputs].reshape(units, inputs)
+            biases = self.parameters[offset + units * inputs:offset + units * (inputs + 1)]
+            self.layers.append((weights, biases, ACTIVATIONS[activation]))
+            offset += units * (inputs + 1)
+        self.output_size = len(self.layers[-1][1])
+        self.dtype = np.dtype(dtype)
+        # each thread keeps its own hidden layer buffers, grown when a bigger chunk comes along
+        self.workspace = threading.local()
+
+    @classmethod
+    def load(cls, path):
+        # served straight from the read-only mapping of the checkpoint, in whatever dtype the weights were stored.
+        # Only views of the mapping are made, no layers and no gradients, so a cold start reads nothing yet
+        header, blobs = read_checkpoint(path, "r")
+        model = cls.__new__(cls)
+        model.bind(blobs["parameters"], [((spec["units"], spec["inputs"]), spec["activation"]) for spec in header["layers"]],
+                   header.get("dtype", "float64"))
+        return model
+
+    def hidden_buffers(self, rows):
+        buffers = getattr(self.workspace, "buffers", None)
+        # a single layer network has no hidden layers, and so no buffers to grow
+        if buffers is None or (buffers and len(buffers[0]) < rows):
+            buffers = [np.empty((rows, len(biases)), dtype=self.dtype) for weights, biases, activation in self.layers[:-1]]
+            self.workspace.buffers = buffers
+        return [buffer[:rows] for buffer in buffers]
+
+    def widened_weights(self, weights):
+        # float16 weights are copied into a per-thread compute dtype scratch right before their matmul,
+        # so the model is stored at half the size and only one layer at a time is ever widened
+        scratch = getattr(self.workspace, "weights", None)
+        if scratch is None:
+            scratch = np.empty(max(layer_weights.size for layer_weights, biases, activation in self.layers), dtype=self.dtype)
+            self.workspace.weights = scratch
+        widened = scratch[:weights.size].reshape(weights.shape)
+        np.copyto(widened, weights)
+        return widened
+
+    def forward_pass(self, data, out=None):
+        outputs = np.atleast_2d(np.asarray(data, dtype=self.dtype))
+        buffers = self.hidden_buffers(len(outputs)) + [out]
+        for (weights, biases, activation), buffer in zip(self.layers, buffers):
+            if weights.dtype != self.dtype:
+                weights = self.widened_weights(weights)
+            outputs = np.dot(outputs, weights.T, out=buffer)
+            outputs += biases
+            outputs = activation.forward(outputs, out=outputs)[0]
+        return outputs
+
+    def predict(self, data_to_predict, chunk_size=1024, prefetch=None):
+        return predict_in_chunks(self.forward_pass, data_to_predict, self.output_size, self.dtype, chunk_size, prefetch)
+
+    def predict_chunks(self, data_to_predict, chunk_size=1024):
+        return outputs_by_chunk(self.forward_pass, data_to_predict, chunk_size)
+
+
+# the most int8 by int8 products a float32 sum holds exactly
+EXACT_BLOCK = 2 ** 24 // (127 * 127)
+
+
+class QuantizedModel(InferenceModel):
+    # int8 weights with a scale per output unit, and a scale per layer for its inputs, calibrated by quantize.
+    # Every layer rounds its inputs onto the int8 grid, multiplies integers and turns the sums back into
+    # real values with input_scale * weight_scales before the biases and the activation
+    def __init__(self, layers, weight_scales, input_scales):
+        self.layers = layers
+        self.input_scales = input_scales
+        self.output_scales = [scales * input_scale for scales, input_scale in zip(weight_scales, input_scales)]
+        self.output_size = len(layers[-1][1])
+        self.dtype = np.dtype(np.float32)
+        self.nbytes = sum(weights.nbytes + biases.nbytes + scales.nbytes for (weights, biases, activation), scales in zip(layers, weight_scales))
+        self.workspace = threading.local()
+
+    def quantized_inputs(self, inputs, input_scale):
+        scratch = getattr(self.workspace, "inputs", None)
+        if scratch is None or scratch.size < inputs.size:
+            scratch = np.empty(inputs.size, dtype=self.dtype)
+            self.workspace.inputs = scratch
+        quantized = scratch[:inputs.size].reshape(inputs.shape)
+        np.multiply(inputs, 1 / input_scale, out=quantized)
+        np.rint(quantized, out=quantized)
+        return np.clip(quantized, -127, 127, out=quantized)
+
+    def forward_pass(self, data, out=None):
+        outputs = np.atleast_2d(np.asarray(data, dtype=self.dtype))
+        buffers = self.hidden_buffers(len(outputs)) + [out]
+        for (weights, biases, activation), input_scale, output_scales, buffer in zip(self.layers, self.input_scales, self.output_scales, buffers):
+            quantized = self.quantized_inputs(outputs, input_scale)
+            widened = self.widened_weights(weights)
+            if weights.shape[1] <= EXACT_BLOCK:
+                # every partial sum is an integer float32 holds exactly, so BLAS can do the integer matmul
+                sums = np.dot(quantized, widened.T, out=buffer)
+            else:
+                # wider layers go in blocks of inputs that keep each partial sum exact in float32, the block sums
+                # add up exactly in float64. No integer copy of the weights is ever made
+                sums = np.zeros((len(quantized), weights.shape[0]))
+                for start in range(0, weights.shape[1], EXACT_BLOCK):
+                    sums += np.dot(quantized[:, start:start + EXACT_BLOCK], widened[:, start:start + EXACT_BLOCK].T)
+            outputs = np.multiply(sums, output_scales, out=buffer, dtype=self.dtype)
+            outputs += biases
+            outputs = activation.forward(outputs, out=outputs)[0]
+        return outputs
+
+
+def quantize(network, calibration_data, chunk_size=1024):
+    # int8 copy of a trained network for prediction. The inputs of each layer are scaled to the largest
+    # value they reach while calibration_data goes through the float network
+    input_ranges = np.zeros(len(network.layers))
+    for start in range(0, len(calibration_data), chunk_size):
+        outputs = np.asarray(calibration_data[start:start + chunk_size], dtype=network.dtype)
+        for i, layer in enumerate(network.layers):
+            input_ranges[i] = max(input_ranges[i], np.max(np.abs(outputs)))
+            outputs = layer.infer(outputs)
+    layers, weight_scales, input_scales = [], [], []
+    for layer, input_range in zip(network.layers, input_ranges):
+        weight_ranges = np.max(np.abs(layer.weights), axis=1)
+        scales = np.where(weight_ranges > 0, weight_ranges / 127, 1).astype(np.float32)
+        weights = np.rint(layer.weights / scales[:, None]).astype(np.int8)
+        layers.append((weights, layer.biases.astype(np.float32), layer.activation))
+        weight_scales.append(scales)
+        input_scales.append(np.float32(input_range / 127 if input_range > 0 else 1))
+    return QuantizedModel(layers, weight_scales, input_scales)
+
+
+training_worker = {}
+
+
+def start_training_worker(header, parameters_name, gradients_name, workers, dataset, loss_function):
+    # a replica of the network whose weights are the shared ones, and one gradient row per shard
+    from multiprocessing import shared_memory
+    parameters_memory = shared_memory.SharedMemory(name=parameters_name)
+    gradients_memory = shared_memory.SharedMemory(name=gradients_name)
+    network = NN.from_header(header)
+    parameter_count = sum(layer.parameter_count for layer in network.layers)
+    network.bind_parameters(np.ndarray(parameter_count, dtype=network.dtype, buffer=parameters_memory.buf))
+    training_worker.update(
+        network=network,
+        memory=(parameters_memory, gradients_memory),
+        gradient_slots=np.ndarray((workers, parameter_count), dtype=network.dtype, buffer=gradients_memory.buf),
+        dataset=dataset,
+        loss_function=loss_function,
+    )
+
+
+def training_worker_step(task):
+    slot, batch_indices = task
+    network = training_worker["network"]
+    # point the replica's gradients at this shard's row of the shared gradient buffer
+    network.bind_parameters(network.parameters, training_worker["gradient_slots"][slot])
+    network.gradients.fill(0)
+    batch_data, batch_answers = training_worker["dataset"].gather(batch_indices)
+    mean_loss = network.compute_gradients(batch_data, batch_answers, training_worker["loss_function"])
+    return mean_loss * len(batch_indices)
+
+
+class DataParallelTrainer:
+    # the weights move to shared memory for the length of a train call, workers write their shard's gradient
+    # sums into their own row of a shared buffer and the rows are added up here before the optimizer step
+    def __init__(self, network, workers, dataset, loss_function):
+        # multiprocessing is only imported once a pool is asked for, it is a good share of the import time otherwise
+        import multiprocessing
+        from multiprocessing import shared_memory
+        self.network = network
+        self.workers = workers
+        parameter_count = network.parameters.size
+        self.parameters_memory = shared_memory.SharedMemory(create=True, size=network.parameters.nbytes)
+        self.gradients_memory = shared_memory.SharedMemory(create=True, size=network.parameters.nbytes * workers)
+        shared_parameters = np.ndarray(parameter_count, dtype=network.dtype, buffer=self.parameters_memory.buf)
+        shared_parameters[...] = network.parameters
+        network.bind_parameters(shared_parameters, network.gradients)
+        self.gradient_slots = np.ndarray((workers, parameter_count), dtype=network.dtype, buffer=self.gradients_memory.buf)
+        header = network.checkpoint_contents(master=True)[0]
+        self.pool = multiprocessing.Pool(workers, initializer=start_training_worker,
+                                         initargs=(header, self.parameters_memory.name, self.gradients_memory.name,
+                                                   workers, dataset, loss_function))
+
+    def compute_gradients(self, batch_indices):
+        shards = np.array_split(np.asarray(batch_indices), min(self.workers, len(batch_indices)))
+        loss_sums = self.pool.map(training_worker_step, list(enumerate(shards)))
+        np.sum(self.gradient_slots[:len(shards)], axis=0, out=self.network.gradients)
+        return sum(loss_sums) / len(batch_indices)
+
+    def close(self):
+        self.pool.terminate()
+        self.pool.join()
+        # back to private memory before the shared blocks go away
+        self.network.bind_parameters(self.network.parameters.copy(), self.network.gradients)
+        self.gradient_slots = None
+        self.parameters_memory.close()
+        self.parameters_memory.unlink()
+        self.gradients_memory.close()
+        self.gradients_memory.unlink()
\ No newline at end of file
@@ -0,0 +1,163 @@
+import contextlib
+import time
+
+# opt-in instrumentation of NN.train, for either backend:
+#     profiler = Profiler(trace_memory=True)
+#     with profiler.attached(network):
+#         network.train(...)
+#     for report in profiler.reports:
+#         print(format_report(report))
+# attach swaps the class of every layer for a subclass whose phases are timed, so a network that is not being profiled
+# runs the plain methods and pays nothing for any of this. Phases that run in worker processes are not seen
+
+PHASES = ("forward", "activation_function", "loss", "back_prop", "update_w_and_b")
+# rough floating point operations per parameter of one Adam step
+ADAM_FLOPS = 10
+
+
+class Profiler:
+    def __init__(self, trace_memory=False, callback=None):
+        # callback gets every epoch's report, without one they pile up in self.reports
+        self.trace_memory = trace_memory
+        self.callback = callback
+        self.reports = []
+        self.network = None
+
+    def attach(self, network):
+        if self.network is not None:
+            raise ValueError("This profiler is already attached to a network")
+        self.network = network
+        # (inputs, units, bytes per value) of every layer, for the FLOP and byte estimates
+        self.shapes = [(len(layer.weights[0]), len(layer.biases), layer.biases.itemsize) for layer in network.layers]
+        # [calls, seconds] per (layer, phase), "network" stands for the phases that are not any one layer's
+        self.totals = {}
+        self.layer_classes = [type(layer) for layer in network.layers]
+        for index, layer in enumerate(network.layers):
+            layer.__class__ = self.profiled_class(type(layer), index)
+        if hasattr(network, "update_w_and_b"):
+            # the NumPy backends step the whole network at once
+            network.update_w_and_b = self.timed(network.update_w_and_b, "network", "update_w_and_b")
+        network.profiler = self
+        self.started_tracing = False
+        if self.trace_memory:
+            import tracemalloc
+            self.started_tracing = not tracemalloc.is_tracing()
+            if self.started_tracing:
+                tracemalloc.start()
+
+    def detach(self):
+        network = self.network
+        for layer, layer_class in zip(network.layers, self.layer_classes):
+            layer.__class__ = layer_class
+        vars(network).pop("update_w_and_b", None)
+        del network.profiler
+        if self.started_tracing:
+            import tracemalloc
+            tracemalloc.stop()
+        self.network = None
+
+    @contextlib.contextmanager
+    def attached(self, network):
+        self.attach(network)
+        try:
+            yield self
+        finally:
+            self.detach()
+
+    def profiled_class(self, layer_class, index):
+        # same layout as the layer's own class, nothing but timed methods on top, so __class__ can be swapped both ways
+        methods = {phase: self.timed(getattr(layer_class, phase), index, phase) for phase in PHASES if hasattr(layer_class, phase)}
+        return type(layer_class.__name__, (layer_class,), dict(methods, __slots__=()))
+
+    def timed(self, method, layer, phase):
+        totals = self.totals.setdefault((layer, phase), [0, 0.0])
+        clock = time.perf_counter
+
+        def timed_method(*args, **kwargs):
+            start = clock()
+            result = method(*args, **kwargs)
+            totals[0] += 1
+            totals[1] += clock() - start
+            return result
+        return timed_method
+
+    def start_epoch(self):
+        # NN.train calls start_epoch, mark and end_epoch on the profiler attached to it
+        for totals in self.totals.values():
+            totals[0], totals[1] = 0, 0.0
+        if self.trace_memory:
+            import tracemalloc
+            tracemalloc.reset_peak()
+        self.epoch_start = self.last_mark = time.perf_counter()
+
+    def mark(self, phase):
+        # the time since the last mark or the start of the epoch goes to phase, for the steps NN.train does itself
+        now = time.perf_counter()
+        totals = self.totals.setdefault(("network", phase), [0, 0.0])
+        totals[0] += 1
+        totals[1] += now - self.last_mark
+        self.last_mark = now
+
+    def estimate(self, layer, phase, calls, samples):
+        # FLOPs and bytes moved, from the layer shapes alone: weights are read once per call, activations once per sample
+        flops, moved = 0, 0
+        for inputs, units, itemsize in (self.shapes if layer == "network" else [self.shapes[layer]]):
+            weights = inputs * units
+            if phase == "forward":
+                flops += (2 * weights + units) * samples
+                moved += (weights + units) * itemsize * calls + (inputs + units) * itemsize * samples
+            elif phase in ("activation_function", "loss"):
+                flops += units * samples
+                moved += 2 * units * itemsize * samples
+            elif phase == "back_prop":
+                # the gradient of the weights and the loss handed back, a multiply and an add each per weight
+                flops += 4 * weights * samples
+                moved += 2 * weights * itemsize * calls + (inputs + 2 * units) * itemsize * samples
+            elif phase == "update_w_and_b":
+                # parameters, gradients and both moments read, three of them written
+                flops += ADAM_FLOPS * (weights + units) * calls
+                moved += 7 * (weights + units) * itemsize * calls
+        return flops, moved
+
+    def end_epoch(self, epoch, samples, loss):
+        seconds = time.perf_counter() - self.epoch_start
+        phases = []
+        for (layer, phase), (calls, phase_seconds) in self.totals.items():
+            if calls:
+                flops, moved = self.estimate(layer, phase, calls, samples)
+                phases.append({"layer": layer, "phase": phase, "calls": calls, "seconds": phase_seconds,
+                               "flops": flops, "bytes": moved})
+        report = {
+            "epoch": epoch,
+            "samples": samples,
+            "loss": loss,
+            "seconds": seconds,
+            # data loading, the training loop itself and the timers
+            "other_seconds": seconds - sum(phase["seconds"] for phase in phases),
+            "flops": sum(phase["flops"] for phase in phases),
+            "bytes": sum(phase["bytes"] for phase in phases),
+            "phases": phases,
+        }
+        if self.trace_memory:
+            import tracemalloc
+            current, peak = tracemalloc.get_traced_memory()
+            report["memory"] = {"current": current, "peak": peak}
+        if self.callback is not None:
+            self.callback(report)
+        else:
+            self.reports.append(report)
+        return report
+
+
+def format_report(report):
+    lines = [f"Epoch {report['epoch']}: {report['seconds']:.4f} s for {report['samples']} samples, "
+             f"{report['flops'] / report['seconds'] / 1e9:.3f} GFLOP/s, {report['bytes'] / report['seconds'] / 1e9:.3f} GB/s"]
+    if "memory" in report:
+        lines.append(f"  memory: {report['memory']['current'] / 1024:.0f} KiB now, {report['memory']['peak'] / 1024:.0f} KiB at the peak")
+    lines.append(f"  {'layer':>7}  {'phase':<20}{'calls':>9}{'seconds':>11}{'share':>8}{'GFLOP/s':>10}")
+    for phase in sorted(report["phases"], key=lambda phase: -phase["seconds"]):
+        gflops = phase["flops"] / phase["seconds"] / 1e9 if phase["seconds"] else 0
+        lines.append(f"  {phase['layer']:>7}  {phase['phase']:<20}{phase['calls']:>9}{phase['seconds']:>11.4f}"
+                     f"{phase['seconds'] / report['seconds']:>8.1%}{gflops:>10.3f}")
+    lines.append(f"  {'':>7}  {'other':<20}{'':>9}{report['other_seconds']:>11.4f}{report['other_seconds'] / report['seconds']:>8.1%}")
+    return "\n".join(lines)
\ No newline at end of file
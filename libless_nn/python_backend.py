@@ -0,0 +1,509 @@
+import contextlib
+import math
+import random
+from array import array
+from operator import mul
+
+from .callbacks import ProgressPrinter
+from .checkpoint import read_doubles, write_checkpoint
+
+E = math.e
+
+
+class Layer:
+    # weights and biases live in one flat array('d') per layer, weights row by row followed by the biases.
+    # self.weights[j] and self.biases are memoryviews into it, the gradients and the Adam moments are laid out the same way
+    __slots__ = ("activation_function_type", "t", "inputs", "units",
+                 "parameters", "weights", "columns", "biases", "gradients", "delta_weights", "delta_biases", "zeros",
+                 "batch_losses", "batch_inputs",
+                 "learning_rate", "beta1", "beta2", "epsilon", "m", "v", "m_weights", "v_weights", "m_biases", "v_biases",
+                 "previous_layer_outputs", "outputs", "post_activation_outputs", "activation_cache", "loss_type", "mean_loss", "d_loss",
+                 "passed_on_loss_array", "loss_to_pass")
+
+    def __init__(self, previous_height, height, activation_function_type, initialize=True):
+        self.inputs = previous_height
+        self.units = height
+        self.zeros = array("d", bytes(8 * (previous_height + 1) * height))
+        if initialize:
+            biases = [1 * (random.random() * 2 - 1) for n in range(height)]
+            weights = [(1 * (random.random()) * 2 - 1) for m in range(height) for n in range(previous_height)]
+            self.bind(array("d", weights + biases), array("d", self.zeros))
+        else:
+            # the values come from a checkpoint, see NN.load
+            self.bind(array("d", self.zeros), array("d", self.zeros))
+        self.batch_losses = []
+        self.batch_inputs = []
+        self.activation_function_type = activation_function_type
+        self.t = 0
+
+    def bind(self, parameters=None, gradients=None):
+        # any buffers of doubles laid out like the layer's own will do, shared memory included, the views follow them
+        if parameters is not None:
+            self.parameters = parameters
+            self.weights, self.biases = self.views(parameters)
+            # strided views down the columns of the weights, what back_prop sends back is one dot product per column
+            weights_size = self.inputs * self.units
+            self.columns = [memoryview(parameters)[n:weights_size:self.inputs] for n in range(self.inputs)]
+        if gradients is not None:
+            self.gradients = gradients
+            self.delta_weights, self.delta_biases = self.views(gradients)
+
+    def views(self, buffer):
+        # one memoryview per row of weights and one for the biases, none of them copies
+        view = memoryview(buffer)
+        weights_size = self.inputs * self.units
+        rows = [view[start:start + self.inputs] for start in range(0, weights_size, self.inputs)]
+        return rows, view[weights_size:]
+
+    def forward(self, previous_layer_outputs):
+        self.previous_layer_outputs = previous_layer_outputs
+        self.outputs = [sum(map(mul, row, previous_layer_outputs)) + bias for row, bias in zip(self.weights, self.biases)]
+
+    def initialize_optimizer(self, beta1, beta2, epsilon, learning_rate):
+        self.learning_rate = learning_rate
+        self.beta1 = beta1
+        self.beta2 = beta2
+        self.epsilon = epsilon
+        self.m = array("d", self.zeros)
+        self.v = array("d", self.zeros)
+        self.m_weights, self.m_biases = self.views(self.m)
+        self.v_weights, self.v_biases = self.views(self.v)
+        self.t = 0
+
+    def activation_function(self):
+        if self.activation_function_type == "None":
+            self.post_activation_outputs = self.outputs
+        elif self.activation_function_type == "ReLU":
+            self.post_activation_outputs = [n if n > 0 else 0 for n in self.outputs]
+        elif self.activation_function_type == "Leaky_ReLU":
+            self.post_activation_outputs = [0.01 * n if n < 0 else n for n in self.outputs]
+        elif self.activation_function_type == "Softmax":
+            largest = max(self.outputs)
+            exp_outputs = [E**(n-largest) for n in self.outputs]
+            total = sum(exp_outputs)
+            self.post_activation_outputs = [n / total for n in exp_outputs]
+        elif self.activation_function_type == "Sigmoid":
+            self.post_activation_outputs = [min(max(sigmoid(n), 1e-15), 1 - 1e-15) for n in self.outputs]
+        elif self.activation_function_type == "Tanh":
+            self.post_activation_outputs = [math.tanh(n) for n in self.outputs]
+        elif self.activation_function_type == "GELU":
+            # tanh approximation, the derivative is kept for back_prop while the inputs are still around
+            c = math.sqrt(2 / math.pi)
+            tanh_inners = [math.tanh(c * n * (1 + 0.044715 * n * n)) for n in self.outputs]
+            self.activation_cache = [0.5 * (1 + t) + 0.5 * n * (1 - t * t) * c * (1 + 3 * 0.044715 * n * n) for n, t in zip(self.outputs, tanh_inners)]
+            self.post_activation_outputs = [n * (0.5 * (1 + t)) for n, t in zip(self.outputs, tanh_inners)]
+        else:
+            raise ValueError(f"Unknown activation: {self.activation_function_type}")
+
+    def loss(self, prediced_list, expected_list, type):
+        self.loss_type = type
+        if self.loss_type == "mse":
+            self.mean_loss = 0.5*(sum((predicted - expected)**2 for predicted, expected in zip(prediced_list, expected_list)))/len(prediced_list)
+            self.d_loss = [predicted - expected for predicted, expected in zip(prediced_list, expected_list)]
+        elif self.loss_type == "log":
+            self.mean_loss = sum(-expected * math.log(predicted + 1e-15) for predicted, expected in zip(self.post_activation_outputs, expected_list))
+            self.d_loss = [predicted - expected for predicted, expected in zip(self.post_activation_outputs, expected_list)]
+
+    def back_prop(self, inputted_loss_array):
+        if self.activation_function_type == "ReLU":
+            passed = [0 if output < 0 else loss for output, loss in zip(self.outputs, inputted_loss_array)]
+        elif self.activation_function_type == "Leaky_ReLU":
+            passed = [0.01 * loss if output < 0 else loss for output, loss in zip(self.outputs, inputted_loss_array)]
+        elif self.activation_function_type == "Tanh":
+            passed = [loss * (1 - output * output) for output, loss in zip(self.post_activation_outputs, inputted_loss_array)]
+        elif self.activation_function_type == "GELU":
+            passed = [loss * derivative for derivative, loss in zip(self.activation_cache, inputted_loss_array)]
+        else:
+            # Softmax and Sigmoid only end the network, where the loss already hands back the gradient before them
+            passed = list(inputted_loss_array)
+        self.passed_on_loss_array = passed
+        self.loss_to_pass = [sum(map(mul, passed, column)) for column in self.columns]
+        # the deltas are summed once per batch in accumulate_gradients, not once per sample
+        self.batch_losses.append(passed)
+        self.batch_inputs.append(self.previous_layer_outputs)
+
+    def accumulate_gradients(self):
+        # delta_weights[j][k] is the sum over the batch of loss[j] * input[k], added up sample by sample in the
+        # same order as per-sample accumulation would. A unit that passed no loss back for the whole batch is skipped
+        input_columns = list(zip(*self.batch_inputs))
+        for j, losses, delta_row in zip(range(self.units), zip(*self.batch_losses), self.delta_weights):
+            if any(losses):
+                delta_row[:] = array("d", [sum(map(mul, losses, column)) for column in input_columns])
+                self.delta_biases[j] = sum(losses)
+        self.batch_losses.clear()
+        self.batch_inputs.clear()
+
+    def update_w_and_b(self, batch_size):
+        self.accumulate_gradients()
+        self.t += 1
+        beta1, beta2, epsilon, learning_rate = self.beta1, self.beta2, self.epsilon, self.learning_rate
+        one_minus_beta1, one_minus_beta2 = 1 - beta1, 1 - beta2
+        # Bias correction, the same for every weight of this step
+        m_correction = 1 - beta1 ** self.t
+        v_correction = 1 - beta2 ** self.t
+        sqrt = math.sqrt
+        # Adam optimizer updates, weights and biases in one pass over the flat buffers
+        gradients = [delta / batch_size for delta in self.gradients]
+        m = [beta1 * m + one_minus_beta1 * gradient for m, gradient in zip(self.m, gradients)]
+        v = [beta2 * v + one_minus_beta2 * (gradient ** 2) for v, gradient in zip(self.v, gradients)]
+        self.parameters[:] = array("d", [parameter - learning_rate * (m_value / m_correction) / (sqrt(v_value / v_correction) + epsilon)
+                                         for parameter, m_value, v_value in zip(self.parameters, m, v)])
+        self.m[:] = array("d", m)
+        self.v[:] = array("d", v)
+        # Reset delta arrays
+        self.gradients[:] = self.zeros
+
+
+class NN:
+    # a profiling.Profiler while one is attached, NN.train reports every epoch to it
+    profiler = None
+    # set by a callback, see callbacks.EarlyStopping, NN.train stops after the epoch it was set in
+    stop_training = False
+    # what schedules multiply their rate by, cut by schedules.ReduceOnPlateau so a schedule does not undo its cuts
+    learning_rate_scale = 1.0
+
+    def __init__(self, input_size, inner_layers_number, height, output_size, inner_layer_activation, last_layer_activation):
+        self.inner_layer_activation = inner_layer_activation
+        self.last_layer_activation = last_layer_activation
+        # the first and last layers draw their starting values before the inner ones, as they always have
+        first_layer = Layer(input_size, height, inner_layer_activation)
+        last_layer = Layer(height, output_size, last_layer_activation)
+        self.layers = [first_layer] + [Layer(height, height, inner_layer_activation) for i in range(inner_layers_number)] + [last_layer]
+
+    def initialize_optimizer(self, beta1, beta2, epsilon, learning_rate):
+        # written to checkpoints the way the NumPy backend writes its own, so either can carry on from the other's files
+        self.optimizer_config = {"beta1": beta1, "beta2": beta2, "epsilon": epsilon, "learning_rate": learning_rate,
+                                 "optimizer": "Adam", "weight_decay": 0.01}
+        for i in range(len(self.layers)):
+            self.layers[i].initialize_optimizer(beta1, beta2, epsilon, learning_rate)
+
+    @property
+    def learning_rate(self):
+        # every layer steps with the same rate, schedules change it between steps through here
+        return self.layers[0].learning_rate
+
+    @learning_rate.setter
+    def learning_rate(self, rate):
+        for layer in self.layers:
+            layer.learning_rate = rate
+
+    def snapshot(self):
+        # a copy of every weight and bias, for restore
+        return concatenate(layer.parameters for layer in self.layers)
+
+    def restore(self, snapshot):
+        offset = 0
+        for layer in self.layers:
+            layer.parameters[:] = snapshot[offset:offset + len(layer.parameters)]
+            offset += len(layer.parameters)
+
+    def forward_pass(self, sample):
+        outputs = sample
+        for layer in self.layers:
+            layer.forward(outputs)
+            layer.activation_function()
+            outputs = layer.post_activation_outputs
+        return outputs
+
+    def compute_gradients(self, sample, answer, loss_function):
+        #forward and activation through every layer
+        self.forward_pass(sample)
+        #now for loss
+        last_layer = self.layers[-1]
+        last_layer.loss(last_layer.post_activation_outputs, answer, loss_function)
+        #now for back prop, from the last layer back, each layer gets the loss of the one after it
+        last_layer.back_prop(last_layer.d_loss)
+        for layer, next_layer in zip(self.layers[-2::-1], self.layers[:0:-1]):
+            layer.back_prop(next_layer.loss_to_pass)
+        return last_layer.mean_loss
+
+    def train(self, epochs, training_data, training_answers, batch_size, workers=None, callbacks=None):
+        # workers > 1 splits every mini-batch over that many processes, see WorkerPool.
+        # callbacks hear about every batch and epoch, see callbacks.Callback; without any the progress is printed
+        callbacks = [ProgressPrinter()] if callbacks is None else callbacks
+        self.stop_training = False
+        for callback in callbacks:
+            callback.on_train_begin(self)
+        try:
+            self.run_epochs(epochs, training_data, training_answers, batch_size, workers, callbacks)
+        finally:
+            for callback in callbacks:
+                callback.on_train_end(self)
+
+    def run_epochs(self, epochs, training_data, training_answers, batch_size, workers, callbacks):
+        current_epoch = 0
+        current_batch = 0
+        loss_function = "log" if self.last_layer_activation == "Softmax" else "mse"
+        if workers is not None and workers > 1:
+            # the order the samples are visited in, the workers hold the data itself. Shuffled in place every epoch
+            # like the serial path shuffles the arrangement the last epoch left, so both visit the samples alike
+            order = list(range(len(training_data)))
+            with contextlib.closing(WorkerPool(self, workers, training_data, training_answers, loss_function)) as pool:
+                for i in range(epochs):
+                    if self.profiler is not None:
+                        self.profiler.start_epoch()
+                    random.shuffle(order)
+                    if self.profiler is not None:
+                        self.profiler.mark("shuffle")
+                    current_epoch_loss = 0
+                    for j in range(0, len(order), batch_size):
+                        batch_loss = pool.compute_gradients(order[j:j + batch_size])
+                        current_epoch_loss += batch_loss
+                        for layer in self.layers:
+                            layer.update_w_and_b(batch_size)
+                        for callback in callbacks:
+                            callback.on_batch_end(self, current_epoch + 1, j // batch_size, batch_loss / len(order[j:j + batch_size]))
+                    current_epoch += 1
+                    self.end_epoch(current_epoch, epochs, current_epoch_loss/len(training_data), len(training_data), callbacks)
+                    if self.stop_training:
+                        break
+            return
+        for i in range(epochs):
+            if self.profiler is not None:
+                self.profiler.start_epoch()
+            current_epoch_loss = 0
+            batch_loss = 0
+            combined_data = list(zip(training_data, training_answers))
+            # Shuffle the combined data
+            random.shuffle(combined_data)
+            # Split the shuffled data back into training_data and training_answers
+            training_data, training_answers = zip(*combined_data)
+            if self.profiler is not None:
+                self.profiler.mark("shuffle")
+            batch = 0
+            for sample, answer in combined_data:
+                current_batch += 1
+                mean_loss = self.compute_gradients(sample, answer, loss_function)
+                batch_loss += mean_loss
+                current_epoch_loss += mean_loss
+                if current_batch == batch_size:
+                    current_batch = 0
+                    for layer in self.layers:
+                        layer.update_w_and_b(batch_size)
+                    for callback in callbacks:
+                        callback.on_batch_end(self, current_epoch + 1, batch, batch_loss / batch_size)
+                    batch += 1
+                    batch_loss = 0
+            if current_batch != 0:
+                for layer in self.layers:
+                    layer.update_w_and_b(batch_size)
+                for callback in callbacks:
+                    callback.on_batch_end(self, current_epoch + 1, batch, batch_loss / current_batch)
+                # every epoch starts a fresh batch, like the workers path and the NumPy backends
+                current_batch = 0
+            current_epoch += 1
+            self.end_epoch(current_epoch, epochs, current_epoch_loss/len(training_data), len(training_data), callbacks)
+            if self.stop_training:
+                break
+
+    def end_epoch(self, epoch, epochs, loss, samples, callbacks):
+        if self.profiler is not None:
+            self.profiler.end_epoch(epoch, samples, loss)
+        logs = {"epoch": epoch, "epochs": epochs, "loss": loss}
+        for callback in callbacks:
+            callback.on_epoch_end(self, epoch, logs)
+
+    def predict(self, data_to_predict, workers=None):
+        self.prediction_outputs = []
+        if workers is not None and workers > 1:
+            with contextlib.closing(WorkerPool(self, workers)) as pool:
+                self.prediction_outputs = pool.predict(data_to_predict)
+            return self.prediction_outputs
+        for sample in data_to_predict:
+            self.prediction_outputs.append(self.forward_pass(sample))
+        return self.prediction_outputs
+
+    def export_weights(self):
+        all_weights = []
+        for i in range(len(self.layers)):
+            all_weights.append([list(row) for row in self.layers[i].weights])
+        return(all_weights)
+
+    def export_biases(self):
+        all_biases = []
+        for i in range(len(self.layers)):
+            all_biases.append(list(self.layers[i].biases))
+        return(all_biases)
+
+    def header(self):
+        # the shape of the network, from_header builds the layers back from it
+        return {
+            "inner_layer_activation": self.inner_layer_activation,
+            "last_layer_activation": self.last_layer_activation,
+            "dtype": "float64",
+            "storage_dtype": "float64",
+            "layers": [{"inputs": layer.inputs, "units": layer.units, "activation": layer.activation_function_type} for layer in self.layers],
+            "optimizer": None,
+        }
+
+    def checkpoint_contents(self):
+        # the same header and flat buffers as the NumPy backend: each layer's weights row by row, then its biases
+        header = self.header()
+        buffers = {"parameters": concatenate(layer.parameters for layer in self.layers)}
+        if hasattr(self, "optimizer_config"):
+            header["optimizer"] = dict(self.optimizer_config, t=self.layers[0].t)
+            buffers["m"] = concatenate(layer.m for layer in self.layers)
+            buffers["v"] = concatenate(layer.v for layer in self.layers)
+        return header, buffers
+
+    def save(self, path):
+        write_checkpoint(path, *self.checkpoint_contents())
+
+    @classmethod
+    def from_header(cls, header):
+        network = cls.__new__(cls)
+        network.inner_layer_activation = header["inner_layer_activation"]
+        network.last_layer_activation = header["last_layer_activation"]
+        network.layers = [Layer(spec["inputs"], spec["units"], spec["activation"], initialize=False) for spec in header["layers"]]
+        return network
+
+    @classmethod
+    def from_layers(cls, header, values):
+        # a network of any shape: a header like the checkpoints' and the starting (weights, biases) of every layer,
+        # weights row by row. See builder.sequential, which checks that they fit together
+        if header.get("dtype", "float64") != "float64":
+            raise ValueError(f"The pure Python backend computes in float64, not {header['dtype']}")
+        network = cls.from_header(header)
+        for layer, (weights, biases) in zip(network.layers, values):
+            layer.parameters[:] = array("d", list(weights) + list(biases))
+        return network
+
+    @classmethod
+    def load(cls, path):
+        # reads checkpoints from either backend, float32 and float16 weights come back as doubles
+        header, blobs = read_doubles(path, ("parameters", "m", "v"))
+        network = cls.from_header(header)
+        parameter_count = sum(len(layer.parameters) for layer in network.layers)
+        if len(blobs["parameters"]) != parameter_count:
+            raise ValueError(f"{path} holds {len(blobs['parameters'])} parameters, its layers need {parameter_count}")
+        optimizer_config = header["optimizer"]
+        if optimizer_config is not None:
+            if optimizer_config["optimizer"] != "Adam":
+                raise ValueError(f"{path} was trained with {optimizer_config['optimizer']}, the pure Python backend only has Adam")
+            network.initialize_optimizer(optimizer_config["beta1"], optimizer_config["beta2"], optimizer_config["epsilon"], optimizer_config["learning_rate"])
+        offset = 0
+        for layer in network.layers:
+            end = offset + len(layer.parameters)
+            layer.parameters[:] = blobs["parameters"][offset:end]
+            if optimizer_config is not None:
+                layer.m[:] = blobs["m"][offset:end]
+                layer.v[:] = blobs["v"][offset:end]
+                layer.t = optimizer_config["t"]
+            offset = end
+        return network
+
+
+def concatenate(buffers):
+    joined = array("d")
+    for buffer in buffers:
+        joined.frombytes(memoryview(buffer).cast("B"))
+    return joined
+
+
+def sigmoid(n):
+    # split on the sign so math.exp never overflows
+    if n >= 0:
+        return 1 / (1 + math.exp(-n))
+    e = math.exp(n)
+    return e / (1 + e)
+
+
+worker = {}
+
+
+def start_worker(header, parameters_name, gradients_name, training_data, training_answers, loss_function):
+    # a replica of the network whose weights are the shared ones
+    from multiprocessing import shared_memory
+    parameters_memory = shared_memory.SharedMemory(name=parameters_name)
+    gradients_memory = shared_memory.SharedMemory(name=gradients_name)
+    network = NN.from_header(header)
+    shared_parameters = parameters_memory.buf.cast("d")
+    offset = 0
+    for layer in network.layers:
+        layer.bind(shared_parameters[offset:offset + len(layer.parameters)])
+        offset += len(layer.parameters)
+    worker.update(
+        network=network,
+        memory=(parameters_memory, gradients_memory),
+        gradient_slots=gradients_memory.buf.cast("d"),
+        parameter_count=offset,
+        training_data=training_data,
+        training_answers=training_answers,
+        loss_function=loss_function,
+    )
+
+
+def worker_gradients(task):
+    slot, batch_indices = task
+    network = worker["network"]
+    # the replica's gradients are this shard's slot of the shared gradient buffer
+    offset = slot * worker["parameter_count"]
+    for layer in network.layers:
+        layer.bind(gradients=worker["gradient_slots"][offset:offset + len(layer.parameters)])
+        layer.gradients[:] = layer.zeros
+        offset += len(layer.parameters)
+    loss_sum = 0
+    for index in batch_indices:
+        loss_sum += network.compute_gradients(worker["training_data"][index], worker["training_answers"][index], worker["loss_function"])
+    for layer in network.layers:
+        layer.accumulate_gradients()
+    return loss_sum
+
+
+def worker_predict(rows):
+    return [list(worker["network"].forward_pass(sample)) for sample in rows]
+
+
+class WorkerPool:
+    # the weights move to shared memory for as long as the pool is open, so every worker sees each update.
+    # Workers sum the gradients of their share of a mini-batch into their own slot of a shared buffer,
+    # the slots are added up here into the layers' gradients before update_w_and_b
+    def __init__(self, network, workers, training_data=None, training_answers=None, loss_function=None):
+        # multiprocessing is only imported once a pool is asked for, it is a good share of the import time otherwise
+        import multiprocessing
+        from multiprocessing import shared_memory
+        self.network = network
+        self.workers = workers
+        self.parameter_count = sum(len(layer.parameters) for layer in network.layers)
+        self.parameters_memory = shared_memory.SharedMemory(create=True, size=8 * self.parameter_count)
+        self.gradients_memory = shared_memory.SharedMemory(create=True, size=8 * self.parameter_count * workers)
+        shared_parameters = self.parameters_memory.buf.cast("d")
+        offset = 0
+        for layer in network.layers:
+            shared_parameters[offset:offset + len(layer.parameters)] = layer.parameters
+            layer.bind(shared_parameters[offset:offset + len(layer.parameters)])
+            offset += len(layer.parameters)
+        self.gradient_slots = self.gradients_memory.buf.cast("d")
+        self.pool = multiprocessing.Pool(workers, initializer=start_worker,
+                                         initargs=(network.header(), self.parameters_memory.name, self.gradients_memory.name,
+                                                   training_data, training_answers, loss_function))
+
+    def shards(self, rows):
+        size = -(-len(rows) // self.workers)
+        return [rows[start:start + size] for start in range(0, len(rows), size)]
+
+    def compute_gradients(self, batch_indices):
+        shards = self.shards(batch_indices)
+        loss_sums = self.pool.map(worker_gradients, list(enumerate(shards)))
+        offset = 0
+        for layer in self.network.layers:
+            slots = [self.gradient_slots[slot * self.parameter_count + offset:slot * self.parameter_count + offset + len(layer.parameters)]
+                     for slot in range(len(shards))]
+            layer.gradients[:] = array("d", map(sum, zip(*slots)))
+            offset += len(layer.parameters)
+        return sum(loss_sums)
+
+    def predict(self, data_to_predict):
+        return [outputs for shard in self.pool.map(worker_predict, self.shards(list(data_to_predict))) for outputs in shard]
+
+    def close(self):
+        self.pool.terminate()
+        self.pool.join()
+        # back to private buffers, the shared blocks can only go once nothing points into them
+        for layer in self.network.layers:
+            layer.bind(array("d", layer.parameters))
+        self.gradient_slots.release()
+        self.parameters_memory.close()
+        self.parameters_memory.unlink()
+        self.gradients_memory.close()
+        self.gradients_memory.unlink()
\ No newline at end of file
@@ -0,0 +1,106 @@
+import math
+
+from .callbacks import Callback
+
+# learning-rate schedules, callbacks that set network.learning_rate, the one rate every parameter steps with.
+# They work in optimizer steps: rate(step) is the rate of the step-th update of training, counted from 0 and carried
+# on over several calls to train. The starting rate is the one the optimizer was initialized with, and what they set
+# is rate(step) times network.learning_rate_scale, which ReduceOnPlateau lowers
+
+
+class Schedule(Callback):
+    def __init__(self):
+        self.step = 0
+        self.base_rate = None
+
+    def rate(self, step):
+        raise NotImplementedError
+
+    def on_train_begin(self, network):
+        if self.base_rate is None:
+            self.base_rate = network.learning_rate
+        network.learning_rate = self.rate(self.step) * network.learning_rate_scale
+
+    def on_batch_end(self, network, epoch, batch, loss):
+        self.step += 1
+        network.learning_rate = self.rate(self.step) * network.learning_rate_scale
+
+    def on_epoch_end(self, network, epoch, logs):
+        logs["learning_rate"] = network.learning_rate
+
+
+class StepDecay(Schedule):
+    # the rate times factor every step_size steps
+    def __init__(self, step_size, factor=0.5):
+        super().__init__()
+        self.step_size = step_size
+        self.factor = factor
+
+    def rate(self, step):
+        return self.base_rate * self.factor ** (step // self.step_size)
+
+
+class CosineDecay(Schedule):
+    # half a cosine from the starting rate down to minimum_rate over total_steps, minimum_rate from then on
+    def __init__(self, total_steps, minimum_rate=0.0):
+        super().__init__()
+        self.total_steps = total_steps
+        self.minimum_rate = minimum_rate
+
+    def rate(self, step):
+        progress = min(step / self.total_steps, 1.0)
+        return self.minimum_rate + (self.base_rate - self.minimum_rate) * 0.5 * (1 + math.cos(math.pi * progress))
+
+
+class Warmup(Schedule):
+    # a straight line up to the starting rate over warmup_steps, then the schedule it wraps, if any, takes over
+    # counting its steps from the end of the warmup: Warmup(500, CosineDecay(10000))
+    def __init__(self, warmup_steps, then=None):
+        super().__init__()
+        self.warmup_steps = warmup_steps
+        self.then = then
+
+    def on_train_begin(self, network):
+        if self.then is not None and self.then.base_rate is None:
+            self.then.base_rate = network.learning_rate
+        super().on_train_begin(network)
+
+    def rate(self, step):
+        if step < self.warmup_steps:
+            return self.base_rate * (step + 1) / self.warmup_steps
+        if self.then is None:
+            return self.base_rate
+        return self.then.rate(step - self.warmup_steps)
+
+
+class ReduceOnPlateau(Callback):
+    # the rate times factor once monitor has not improved by min_delta for patience epochs that reported it.
+    # monitor is anything in the epoch logs, "loss" or, after a Validation callback, "val_loss".
+    # The cut goes into network.learning_rate_scale too, so a schedule running alongside keeps it from then on
+    def __init__(self, monitor="val_loss", factor=0.1, patience=3, min_delta=0.0, minimum_rate=0.0, mode=None):
+        self.monitor = monitor
+        self.factor = factor
+        self.patience = patience
+        self.min_delta = min_delta
+        self.minimum_rate = minimum_rate
+        self.sign = -1 if (mode or ("max" if "accuracy" in monitor else "min")) == "max" else 1
+
+    def on_train_begin(self, network):
+        self.best = math.inf
+        self.waited = 0
+
+    def on_epoch_end(self, network, epoch, logs):
+        if self.monitor in logs:
+            value = self.sign * logs[self.monitor]
+            if value < self.best - self.min_delta:
+                self.best = value
+                self.waited = 0
+            else:
+                self.waited += 1
+                if self.waited >= self.patience:
+                    rate = max(network.learning_rate * self.factor, self.minimum_rate)
+                    if network.learning_rate > 0:
+                        network.learning_rate_scale *= rate / network.learning_rate
+                    network.learning_rate = rate
+                    self.waited = 0
+        logs["learning_rate"] = network.learning_rate
\ No newline at end of file
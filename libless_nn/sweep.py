@@ -0,0 +1,297 @@
+import hashlib
+import itertools
+import json
+import math
+import os
+import random
+import time
+
+import numpy as np
+
+from . import network_class
+from .callbacks import Callback
+from .metrics import Metrics, evaluate
+from .numpy_backend import Dataset
+
+# hyperparameter sweeps over the arguments of train_and_test, trials run side by side in a process pool.
+#     sweep = Sweep((questions, answers), validation=(held_out_questions, held_out_answers), results_path="sweep.jsonl")
+#     results = sweep.run(random_search({"learning_rate": LogUniform(1e-4, 1e-1), "neurons_per_layer": [16, 32, 64]}, 20))
+# The data goes to shared memory once and every worker reads the same pages, a MemmapDataset maps its files instead.
+# Every finished trial is a line of results_path, a sweep run again skips what is already there
+
+# what a trial does not set itself, named like the arguments of train_and_test
+DEFAULTS = {
+    "inner_layers_amount": 2,
+    "neurons_per_layer": 16,
+    "inner_neuron_activation": "Leaky_ReLU",
+    "last_layer_activation": "Softmax",
+    "epochs": 10,
+    "learning_rate": 0.01,
+    "batch_size": 32,
+    "beta1": 0.9,
+    "beta2": 0.999,
+    "epsilon": 1e-8,
+    "optimizer": "Adam",
+    "seed": 0,
+}
+
+
+class Uniform:
+    def __init__(self, low, high):
+        self.low = low
+        self.high = high
+
+    def sample(self, generator):
+        return generator.uniform(self.low, self.high)
+
+
+class LogUniform(Uniform):
+    # evenly spread over the orders of magnitude, for learning rates and the like
+    def sample(self, generator):
+        return math.exp(generator.uniform(math.log(self.low), math.log(self.high)))
+
+
+def grid(space):
+    # every combination of the lists in space
+    names = list(space)
+    return [dict(zip(names, values)) for values in itertools.product(*(space[name] for name in names))]
+
+
+def random_search(space, trials, seed=0):
+    # lists are picked from, Uniform and LogUniform sampled, anything else is used as it is
+    generator = random.Random(seed)
+    sampled = []
+    for i in range(trials):
+        trial = {}
+        for name, values in space.items():
+            if isinstance(values, list):
+                trial[name] = generator.choice(values)
+            elif hasattr(values, "sample"):
+                trial[name] = values.sample(generator)
+            else:
+                trial[name] = values
+        sampled.append(trial)
+    return sampled
+
+
+def share_dataset(dataset, memories):
+    # a Dataset's arrays are copied into shared memory blocks (kept alive in memories), anything else, a MemmapDataset
+    # for one, goes to the workers as it is
+    from multiprocessing import shared_memory
+    if not isinstance(dataset, Dataset):
+        return ("object", dataset)
+    blocks = []
+    for array in (dataset.features, dataset.answers):
+        memory = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+        np.ndarray(array.shape, dtype=array.dtype, buffer=memory.buf)[...] = array
+        memories.append(memory)
+        blocks.append((memory.name, array.shape, array.dtype.str))
+    return ("shared", blocks)
+
+
+def attach_dataset(shared, memories):
+    from multiprocessing import shared_memory
+    kind, value = shared
+    if kind == "object":
+        return value
+    arrays = []
+    for name, shape, dtype in value:
+        memory = shared_memory.SharedMemory(name=name)
+        memories.append(memory)
+        arrays.append(np.ndarray(shape, dtype=dtype, buffer=memory.buf))
+    return Dataset(*arrays)
+
+
+def as_dataset(data):
+    # a Dataset, a MemmapDataset or a (questions, answers) pair
+    if data is None or hasattr(data, "gather"):
+        return data
+    return Dataset(*data)
+
+
+def validation_arrays(dataset):
+    return dataset.features, dataset.answers if hasattr(dataset, "answers") else dataset.labels
+
+
+sweep_worker = {}
+
+
+def start_sweep_worker(backend, training, validation, progress=None):
+    memories = []
+    sweep_worker.update(
+        backend=backend,
+        memories=memories,
+        training=attach_dataset(training, memories),
+        validation=None if validation is None else attach_dataset(validation, memories),
+        progress=progress,
+    )
+
+
+class TrialMonitor(Callback):
+    # keeps the loss of every epoch and stops a trial that does worse than the median of the others at the same
+    # epoch: the finished ones in curves and, through the shared progress dict, the ones running next to it
+    def __init__(self, first_epoch, curves, prune_after, minimum_trials, key=None, progress=None):
+        self.first_epoch = first_epoch
+        self.curves = curves
+        self.prune_after = prune_after
+        self.minimum_trials = minimum_trials
+        self.key = key
+        self.progress = progress
+        self.losses = []
+        self.pruned = False
+
+    def on_epoch_end(self, network, epoch, logs):
+        self.losses.append(float(logs["loss"]))
+        if self.progress is not None:
+            self.progress[self.key] = list(self.losses)
+        epoch = self.first_epoch + epoch
+        if self.prune_after is None or epoch < self.prune_after:
+            return
+        curves = self.curves
+        if self.progress is not None:
+            curves = curves + [curve for key, curve in self.progress.items() if key != self.key]
+        others = [curve[epoch - 1] for curve in curves if len(curve) >= epoch]
+        if len(others) >= self.minimum_trials and logs["loss"] > np.median(others):
+            self.pruned = True
+            network.stop_training = True
+
+
+def run_trial(task):
+    parameters, key, epochs, checkpoint, first_epoch, curves, prune_after, minimum_trials = task
+    start = time.perf_counter()
+    dataset = sweep_worker["training"]
+    network_type = network_class(sweep_worker["backend"])
+    random.seed(parameters["seed"])
+    np.random.seed(parameters["seed"])
+    if first_epoch:
+        # successive halving carries on from where the last rung left the trial
+        network = network_type.load(checkpoint)
+    else:
+        features, answers = dataset.gather(np.arange(1))
+        network = network_type(features.shape[1], parameters["inner_layers_amount"], parameters["neurons_per_layer"],
+                               answers.shape[1], parameters["inner_neuron_activation"], parameters["last_layer_activation"])
+        if parameters["optimizer"] == "Adam":
+            network.initialize_optimizer(parameters["beta1"], parameters["beta2"], parameters["epsilon"], parameters["learning_rate"])
+        else:
+            network.initialize_optimizer(parameters["beta1"], parameters["beta2"], parameters["epsilon"], parameters["learning_rate"],
+                                         optimizer=parameters["optimizer"])
+    progress = sweep_worker["progress"] if prune_after is not None else None
+    monitor = TrialMonitor(first_epoch, curves, prune_after, minimum_trials, key, progress)
+    if sweep_worker["backend"] == "python":
+        # the pure Python backend trains on lists, each worker makes its own
+        network.train(epochs, dataset.features.tolist(), dataset.answers.tolist(), parameters["batch_size"], callbacks=[monitor])
+    else:
+        network.train(epochs, dataset, None, parameters["batch_size"], callbacks=[monitor])
+    if checkpoint is not None:
+        network.save(checkpoint)
+    if monitor.pruned and progress is not None:
+        # a pruned curve is not one to be measured against
+        progress.pop(key, None)
+    result = {"status": "pruned" if monitor.pruned else "complete", "losses": monitor.losses}
+    if sweep_worker["validation"] is not None:
+        # scored once, at the end of the trial or of its rung
+        num_classes = len(network.layers[-1].biases) if parameters["last_layer_activation"] in ("Softmax", "Sigmoid") else None
+        loss_function = "log" if parameters["last_layer_activation"] == "Softmax" else "mse"
+        metrics = evaluate(network, *validation_arrays(sweep_worker["validation"]), Metrics(num_classes, loss_function))
+        result.update((name, value) for name, value in metrics.result(prefix="val_").items() if name != "val_confusion_matrix")
+    result["seconds"] = time.perf_counter() - start
+    return result
+
+
+class Sweep:
+    def __init__(self, training, validation=None, results_path="sweep.jsonl", workers=None, backend="numpy_batched",
+                 objective=None, prune_after=None, minimum_trials=3):
+        # training and validation are a Dataset, a MemmapDataset or a (questions, answers) pair.
+        # objective is what trials are ranked by, val_loss with validation data and the last epoch's loss without;
+        # names with "accuracy" in them count as higher is better. prune_after is the first epoch from which a trial
+        # whose loss is above the median of at least minimum_trials others at the same epoch, finished or running, is stopped
+        self.training = as_dataset(training)
+        self.validation = as_dataset(validation)
+        self.results_path = results_path
+        self.workers = workers or os.cpu_count()
+        self.backend = backend
+        self.objective = objective or ("val_loss" if validation is not None else "loss")
+        self.sign = -1 if "accuracy" in self.objective else 1
+        self.prune_after = prune_after
+        self.minimum_trials = minimum_trials
+        self.results = {}
+        if os.path.exists(results_path):
+            with open(results_path) as file:
+                for line in file:
+                    if line.strip():
+                        result = json.loads(line)
+                        self.results[result["key"]] = result
+
+    def score(self, result):
+        # what trials are sorted by, pruned ones after all that finished
+        value = result["losses"][-1] if self.objective == "loss" else result[self.objective]
+        return (result["status"] == "pruned", self.sign * value)
+
+    def trial_key(self, parameters, rung=None):
+        return json.dumps([parameters, rung], sort_keys=True)
+
+    def run_trials(self, tasks):
+        # tasks are (parameters, rung, epochs, checkpoint, first_epoch); the ones already in the results table are not
+        # run again. Workers get a trial each and the next one once they are done. Trials report every epoch's loss
+        # to a shared dict, so pruning measures against the trials running alongside as well as the finished ones
+        import multiprocessing
+        from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+        pending = [task for task in tasks if self.trial_key(task[0], task[1]) not in self.results]
+        if pending:
+            memories = []
+            manager = multiprocessing.Manager() if self.prune_after is not None else None
+            try:
+                training = share_dataset(self.training, memories)
+                validation = None if self.validation is None else share_dataset(self.validation, memories)
+                progress = None if manager is None else manager.dict()
+                curves = [result["losses"] for result in self.results.values()
+                          if result["status"] == "complete" and result["rung"] is None]
+                with ProcessPoolExecutor(min(self.workers, len(pending)), initializer=start_sweep_worker,
+                                         initargs=(self.backend, training, validation, progress)) as pool, open(self.results_path, "a") as table:
+                    running = {}
+                    while pending or running:
+                        while pending and len(running) < self.workers:
+                            parameters, rung, epochs, checkpoint, first_epoch = task = pending.pop(0)
+                            future = pool.submit(run_trial, (parameters, self.trial_key(parameters, rung), epochs, checkpoint,
+                                                             first_epoch, curves, self.prune_after if rung is None else None,
+                                                             self.minimum_trials))
+                            running[future] = task
+                        done, _ = wait(running, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            parameters, rung = running.pop(future)[:2]
+                            result = dict(future.result(), key=self.trial_key(parameters, rung), parameters=parameters, rung=rung)
+                            self.results[result["key"]] = result
+                            # one line per trial, flushed straight away so an interrupted sweep keeps what it finished
+                            table.write(json.dumps(result) + "\n")
+                            table.flush()
+            finally:
+                if manager is not None:
+                    manager.shutdown()
+                for memory in memories:
+                    memory.close()
+                    memory.unlink()
+        return [self.results[self.trial_key(task[0], task[1])] for task in tasks]
+
+    def run(self, trials):
+        # every trial for its full epochs, best first
+        tasks = [(dict(DEFAULTS, **trial), None, dict(DEFAULTS, **trial)["epochs"], None, 0) for trial in trials]
+        return sorted(self.run_trials(tasks), key=self.score)
+
+    def successive_halving(self, trials, min_epochs=1, eta=3, checkpoint_directory=None):
+        # every trial gets min_epochs, the best 1/eta of them carry on to eta times as many epochs in all, and so on
+        # until one is left. Trials carry on from checkpoints written next to the results table
+        checkpoint_directory = checkpoint_directory or f"{self.results_path}.checkpoints"
+        os.makedirs(checkpoint_directory, exist_ok=True)
+        survivors = [dict(DEFAULTS, **trial) for trial in trials]
+        rung, trained = 0, 0
+        while True:
+            total = min_epochs * eta ** rung
+            tasks = []
+            for parameters in survivors:
+                name = hashlib.sha1(self.trial_key(parameters).encode()).hexdigest()[:16]
+                tasks.append((parameters, rung, total - trained, os.path.join(checkpoint_directory, f"{name}.llnn"), trained))
+            results = sorted(self.run_trials(tasks), key=self.score)
+            if len(results) <= 1:
+                return results
+            survivors = [result["parameters"] for result in results[:max(1, len(results) // eta)]]
+            rung, trained = rung + 1, total
\ No newline at end of file
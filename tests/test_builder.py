@@ -0,0 +1,35 @@
+import json
+import random
+
+import numpy as np
+import pytest
+
+import libless_nn
+from libless_nn.builder import layer, sequential
+
+
+def test_widths_can_be_numpy_integers(tmp_path):
+    network = sequential(np.int64(6), [layer(np.int64(5)), layer(np.int32(3), "Softmax")], backend="numpy_batched")
+    assert [weights.shape for weights in network.export_weights()] == [(5, 6), (3, 5)]
+    # the header of a checkpoint is JSON, plain ints only
+    path = str(tmp_path / "network.llnn")
+    network.save(path)
+    json.dumps(libless_nn.read_header(path)[0])
+
+
+@pytest.mark.parametrize("units", [True, 0, -3, 2.0, "4", None])
+def test_bad_widths_are_rejected(units):
+    with pytest.raises(ValueError, match="Layer 0: units"):
+        sequential(6, [layer(units), layer(3, "Softmax")])
+
+
+@pytest.mark.parametrize("backend", list(libless_nn.BACKENDS))
+def test_single_layer_networks_train(backend):
+    rng = np.random.RandomState(0)
+    questions, answers = rng.rand(32, 6), np.eye(3)[rng.randint(0, 3, 32)]
+    random.seed(0)
+    network = sequential(6, [layer(3, "Softmax")], backend=backend)
+    network.initialize_optimizer(0.9, 0.999, 1e-8, 0.01)
+    as_lists = backend == "python"
+    network.train(2, questions.tolist() if as_lists else questions, answers.tolist() if as_lists else answers, 8, callbacks=[])
+    assert np.shape(network.predict(questions.tolist() if as_lists else questions)) == (32, 3)
\ No newline at end of file
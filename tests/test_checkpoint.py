@@ -0,0 +1,82 @@
+import random
+
+import numpy as np
+import pytest
+
+import libless_nn
+from libless_nn.callbacks import Callback
+from libless_nn.numpy_backend import NN, InferenceModel
+
+
+class Interrupt(Callback):
+    # stands in for a crash part way through training
+    def __init__(self, after_batches):
+        self.after_batches = after_batches
+        self.batches = 0
+
+    def on_batch_end(self, network, epoch, batch, loss):
+        self.batches += 1
+        if self.batches == self.after_batches:
+            raise KeyboardInterrupt
+
+
+def data(samples=256):
+    rng = np.random.RandomState(0)
+    return rng.rand(samples, 8), np.eye(4)[rng.randint(0, 4, samples)]
+
+
+def fresh(seed):
+    random.seed(seed)
+    np.random.seed(seed)
+    network = NN(8, 2, 16, 4, "ReLU", "Softmax")
+    network.initialize_optimizer(0.9, 0.999, 1e-8, 0.01)
+    return network
+
+
+@pytest.mark.parametrize("unit, every", [("steps", 7), ("epochs", 1)])
+def test_resume_is_bit_for_bit(tmp_path, unit, every):
+    questions, answers = data()
+    path = str(tmp_path / "resume.llnn")
+    expected = fresh(1)
+    random.seed(9)
+    np.random.seed(9)
+    expected.train(4, questions, answers, 32, callbacks=[])
+    interrupted = fresh(1)
+    random.seed(9)
+    np.random.seed(9)
+    with pytest.raises(KeyboardInterrupt):
+        interrupted.train(4, questions, answers, 32, checkpoint_path=path, checkpoint_every=every, checkpoint_unit=unit,
+                          callbacks=[Interrupt(20)])
+    resumed = fresh(123)
+    resumed.train(4, questions, answers, 32, checkpoint_path=path, checkpoint_every=every, checkpoint_unit=unit,
+                  resume=True, callbacks=[])
+    assert np.array_equal(resumed.parameters, expected.parameters)
+    assert resumed.optimizer.t == expected.optimizer.t
+
+
+@pytest.mark.parametrize("source", list(libless_nn.BACKENDS))
+def test_checkpoints_load_on_every_backend(tmp_path, source):
+    questions, answers = data(64)
+    random.seed(4)
+    network = libless_nn.create(8, 2, 8, 4, "GELU", "Softmax", backend=source)
+    network.initialize_optimizer(0.9, 0.999, 1e-8, 0.01)
+    as_lists = source == "python"
+    network.train(1, questions.tolist() if as_lists else questions, answers.tolist() if as_lists else answers, 64, callbacks=[])
+    expected = np.array(network.predict(questions.tolist() if as_lists else questions))
+    path = str(tmp_path / "network.llnn")
+    network.save(path)
+    for destination in libless_nn.BACKENDS:
+        loaded = libless_nn.load(path, backend=destination)
+        predictions = np.array(loaded.predict(questions.tolist() if destination == "python" else questions))
+        assert np.allclose(predictions, expected, rtol=0, atol=1e-12)
+
+
+def test_inference_model_load_matches_freeze(tmp_path):
+    questions, answers = data(64)
+    network = fresh(2)
+    network.train(1, questions, answers, 16, callbacks=[])
+    path = str(tmp_path / "network.llnn")
+    network.save(path)
+    loaded = InferenceModel.load(path)
+    assert not loaded.parameters.flags.writeable
+    assert np.array_equal(loaded.predict(questions), network.freeze().predict(questions))
\ No newline at end of file
@@ -0,0 +1,78 @@
+import random
+
+import numpy as np
+
+import libless_nn
+from libless_nn.numpy_backend import NN, PerSampleNN
+
+
+def data(samples=64, inputs=6, classes=3, seed=0):
+    rng = np.random.RandomState(seed)
+    return rng.rand(samples, inputs), np.eye(classes)[rng.randint(0, classes, samples)]
+
+
+def flat_parameters(network):
+    return np.concatenate([np.ravel(weights) for weights in network.export_weights()]
+                          + [np.ravel(biases) for biases in network.export_biases()])
+
+
+def test_batched_gradients_match_per_sample_gradients():
+    questions, answers = data()
+    random.seed(1)
+    batched = NN(6, 2, 8, 3, "Leaky_ReLU", "Softmax")
+    random.seed(1)
+    per_sample = PerSampleNN(6, 2, 8, 3, "Leaky_ReLU", "Softmax")
+    batched_loss = batched.compute_gradients(questions, answers, "log")
+    per_sample_loss = per_sample.compute_gradients(questions, answers, "log")
+    assert np.isclose(batched_loss, per_sample_loss)
+    assert np.allclose(batched.gradients, per_sample.gradients)
+
+
+def test_pure_python_gradients_match_numpy():
+    questions, answers = data(16)
+    for activation in ("ReLU", "Tanh", "GELU"):
+        random.seed(2)
+        numpy_network = NN(6, 1, 8, 3, activation, "Softmax")
+        random.seed(2)
+        python_network = libless_nn.create(6, 1, 8, 3, activation, "Softmax", backend="python")
+        numpy_network.compute_gradients(questions, answers, "log")
+        for sample, answer in zip(questions.tolist(), answers.tolist()):
+            python_network.compute_gradients(sample, answer, "log")
+        for layer in python_network.layers:
+            layer.accumulate_gradients()
+        python_gradients = np.concatenate([np.asarray(layer.gradients) for layer in python_network.layers])
+        assert np.allclose(numpy_network.gradients, python_gradients)
+
+
+def test_backends_start_from_the_same_weights():
+    starts = []
+    for backend in libless_nn.BACKENDS:
+        random.seed(3)
+        starts.append(flat_parameters(libless_nn.create(6, 2, 8, 3, "ReLU", "Softmax", backend=backend)))
+    assert all(np.array_equal(start, starts[0]) for start in starts)
+
+
+def test_numpy_workers_match_serial_training():
+    questions, answers = data(256)
+    parameters = []
+    for workers in (None, 2):
+        random.seed(4)
+        np.random.seed(4)
+        network = NN(6, 2, 16, 3, "ReLU", "Softmax")
+        network.initialize_optimizer(0.9, 0.999, 1e-8, 0.01)
+        network.train(2, questions, answers, 32, workers=workers, callbacks=[])
+        parameters.append(network.parameters.copy())
+    assert np.allclose(parameters[0], parameters[1], rtol=0, atol=1e-12)
+
+
+def test_python_workers_match_serial_training():
+    # 100 samples in batches of 16, so the last batch of every epoch is a partial one
+    questions, answers = data(100)
+    parameters = []
+    for workers in (None, 3):
+        random.seed(5)
+        network = libless_nn.create(6, 1, 8, 3, "Leaky_ReLU", "Softmax", backend="python")
+        network.initialize_optimizer(0.9, 0.999, 1e-8, 0.01)
+        network.train(3, questions.tolist(), answers.tolist(), 16, workers=workers, callbacks=[])
+        parameters.append(flat_parameters(network))
+    assert np.allclose(parameters[0], parameters[1], rtol=0, atol=1e-12)
\ No newline at end of file
@@ -0,0 +1,39 @@
+import random
+
+import numpy as np
+
+from libless_nn.numpy_backend import NN, ScaledRows, quantize
+
+
+def network():
+    random.seed(0)
+    return NN(20, 1, 8, 4, "ReLU", "Softmax")
+
+
+def test_prefetched_array_matches_plain_predict():
+    # more chunks than the prefetcher has buffers, which used to hang on plain arrays
+    neural = network()
+    data = np.random.RandomState(0).rand(300, 20)
+    expected = neural.predict(data).copy()
+    assert np.allclose(neural.predict(data, chunk_size=20, prefetch=2), expected)
+
+
+def test_prefetched_list_matches_plain_predict():
+    neural = network()
+    data = np.random.RandomState(1).rand(100, 20)
+    expected = neural.predict(data).copy()
+    assert np.allclose(neural.freeze().predict(data.tolist(), chunk_size=7, prefetch=1), expected)
+
+
+def test_prefetched_quantized_matches_plain_predict():
+    data = np.random.RandomState(2).rand(200, 20)
+    quantized = quantize(network(), data)
+    assert np.array_equal(quantized.predict(data, chunk_size=10, prefetch=2), quantized.predict(data))
+
+
+def test_prefetched_rows_reuse_their_buffers():
+    neural = network()
+    raw = np.random.RandomState(3).randint(0, 256, (150, 20)).astype(np.uint8)
+    rows = ScaledRows(raw, 1 / 255)
+    expected = neural.predict(raw / 255).copy()
+    assert np.allclose(neural.predict(rows, chunk_size=16, prefetch=2), expected)
\ No newline at end of file
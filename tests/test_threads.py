@@ -0,0 +1,42 @@
+import random
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from libless_nn.numpy_backend import NN, quantize
+
+
+def network(dtype=np.float64, storage_dtype=None):
+    random.seed(0)
+    return NN(30, 2, 32, 4, "ReLU", "Softmax", dtype=dtype, storage_dtype=storage_dtype)
+
+
+# slices of different sizes, so the per-thread buffers get grown while other threads use theirs
+BOUNDS = [(0, 100), (100, 700), (700, 750), (750, 2000)]
+
+
+def predict_slices(model, questions):
+    return np.concatenate([model.predict(questions[start:end], chunk_size=64) for start, end in BOUNDS])
+
+
+def predict_in_threads(model, questions, threads=4):
+    with ThreadPoolExecutor(threads) as pool:
+        results = list(pool.map(lambda bound: model.predict(questions[bound[0]:bound[1]], chunk_size=64), BOUNDS * 4))
+    return [np.concatenate(results[i:i + len(BOUNDS)]) for i in range(0, len(results), len(BOUNDS))]
+
+
+def test_frozen_model_predicts_the_same_from_many_threads():
+    questions = np.random.RandomState(0).rand(2000, 30)
+    for dtype, storage_dtype in ((np.float64, None), (np.float32, np.float16)):
+        model = network(dtype, storage_dtype).freeze()
+        expected = predict_slices(model, questions)
+        for predictions in predict_in_threads(model, questions):
+            assert np.array_equal(predictions, expected)
+
+
+def test_quantized_model_predicts_the_same_from_many_threads():
+    questions = np.random.RandomState(1).rand(2000, 30)
+    model = quantize(network(), questions[:500])
+    expected = predict_slices(model, questions)
+    for predictions in predict_in_threads(model, questions):
+        assert np.array_equal(predictions, expected)
\ No newline at end of file